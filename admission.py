@@ -0,0 +1,225 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can't be admitted. `retry_after` is a hint in seconds."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class CircuitOpenError(Exception):
+    """Raised while the circuit breaker blocks new sandbox creation."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class Ticket:
+    def __init__(self, user):
+        self.user = user
+        self.admitted_at = time.time()
+        self.queued_at = None
+        self.started_at = None
+        self.finished = False
+
+
+class AdmissionController:
+    """
+    Limits sandbox-backed work, globally and per user.
+
+    `admit(user)` runs at request time and never blocks: it rejects right away
+    when `max_queue` admitted tickets haven't started yet or the user has
+    `max_per_user` tickets in flight. When the work is ready to run (e.g. its job
+    got a job thread), `slot(ticket)` queues the ticket and waits, in the order
+    tickets got there, until one of `max_concurrent` run slots is free, for at
+    most `queue_timeout` seconds. A ticket whose job is still queued elsewhere
+    holds no place in that line, so it can't hold up tickets that are ready.
+    """
+
+    def __init__(self, max_concurrent=4, max_queue=16, max_per_user=3, queue_timeout=120):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        # Admitted tickets that haven't started; the ones in slot() are also in _waiting
+        self._pending = 0
+        self._waiting = deque()
+        self._running = 0
+        self._per_user = {}
+        # Moving average of how long a ticket holds its slot, for Retry-After
+        self._avg_service = 5.0
+        self._counters = {"admitted": 0, "rejected_queue_full": 0, "rejected_per_user": 0, "queue_timeouts": 0, "completed": 0}
+
+    def admit(self, user):
+        with self._cond:
+            if self._per_user.get(user, 0) >= self.max_per_user:
+                self._counters["rejected_per_user"] += 1
+                raise AdmissionRejected(
+                    f"You already have {self.max_per_user} requests in progress. Please wait for one to finish.",
+                    retry_after=self._avg_service,
+                )
+            if self._pending >= self.max_queue:
+                self._counters["rejected_queue_full"] += 1
+                raise AdmissionRejected("Server is busy, please try again shortly.", retry_after=self._estimate_wait(self._pending))
+            ticket = Ticket(user)
+            self._pending += 1
+            self._per_user[user] = self._per_user.get(user, 0) + 1
+            self._counters["admitted"] += 1
+            return ticket
+
+    @contextmanager
+    def slot(self, ticket):
+        """Waits for a run slot for an admitted ticket and holds it for the block."""
+        with self._cond:
+            if ticket.finished or ticket.queued_at is not None:
+                raise Exception("Ticket was already used or cancelled.")
+            ticket.queued_at = time.time()
+            deadline = ticket.queued_at + self.queue_timeout
+            self._waiting.append(ticket)
+            while self._running >= self.max_concurrent or self._waiting[0] is not ticket:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._counters["queue_timeouts"] += 1
+                    self._finish(ticket)
+                    raise AdmissionRejected("Timed out waiting for a free worker.", retry_after=self._avg_service)
+                self._cond.wait(remaining)
+            self._waiting.popleft()
+            self._pending -= 1
+            self._running += 1
+            ticket.started_at = time.time()
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._avg_service = 0.8 * self._avg_service + 0.2 * (time.time() - ticket.started_at)
+                self._counters["completed"] += 1
+                self._finish(ticket)
+
+    def cancel(self, ticket):
+        """Gives up a ticket that never got to run (e.g. the job could not be queued)."""
+        with self._cond:
+            if ticket.started_at is None and not ticket.finished:
+                self._finish(ticket)
+
+    def stats(self):
+        with self._cond:
+            stats = {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "max_per_user": self.max_per_user,
+                "running": self._running,
+                "pending": self._pending,
+                "waiting": len(self._waiting),
+                "avg_service_s": round(self._avg_service, 2),
+            }
+            stats.update(self._counters)
+            return stats
+
+    def _finish(self, ticket):
+        # Caller holds the lock
+        if ticket.finished:
+            return
+        ticket.finished = True
+        if ticket.started_at is None:
+            self._pending -= 1
+            try:
+                self._waiting.remove(ticket)
+            except ValueError:
+                pass
+        count = self._per_user.get(ticket.user, 0) - 1
+        if count > 0:
+            self._per_user[ticket.user] = count
+        else:
+            self._per_user.pop(ticket.user, None)
+        self._cond.notify_all()
+
+    def _estimate_wait(self, position):
+        return self._avg_service * (position // self.max_concurrent + 1)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency (here: sandbox creation).
+
+    After `failure_threshold` consecutive failures the circuit opens and `before()`
+    raises CircuitOpenError for `reset_timeout` seconds. Then one probe call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, name="sandbox creation"):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0
+        self._probing = False
+        self._counters = {"opened": 0, "rejected": 0, "probes": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def retry_after(self):
+        """Seconds until the next probe is allowed, 0 if calls currently go through."""
+        with self._lock:
+            if self._state != "open":
+                return 0
+            return max(0, self._opened_at + self.reset_timeout - time.time())
+
+    def before(self):
+        with self._lock:
+            if self._state == "closed":
+                return
+            if self._state == "open" and time.time() - self._opened_at >= self.reset_timeout:
+                self._state = "half_open"
+            if self._state == "half_open" and not self._probing:
+                self._probing = True
+                self._counters["probes"] += 1
+                return
+            self._counters["rejected"] += 1
+            retry_after = max(1, self._opened_at + self.reset_timeout - time.time())
+        raise CircuitOpenError(f"{self.name} is paused after repeated failures, retrying in {int(retry_after)}s.", retry_after)
+
+    def record_success(self):
+        with self._lock:
+            if self._state != "closed":
+                print(f"Circuit for {self.name} closed again.")
+            self._state = "closed"
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._counters["opened"] += 1
+                    print(f"Circuit for {self.name} opened after {self._failures} failure(s).")
+                self._state = "open"
+                self._opened_at = time.time()
+                self._probing = False
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+            }
+            stats.update(self._counters)
+            return stats
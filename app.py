@@ -1,20 +1,74 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory, Response
 from flask_cors import CORS
 from flask_session import Session
 import os
-import yaml
 import json
+import threading
+import hashlib
+import hmac
+from collections import OrderedDict
+from contextlib import contextmanager
 from user_manager import UserManager
+from job_queue import JobQueue
+from admission import AdmissionController, AdmissionRejected, CircuitOpenError
 from ai_ats_checker import AIATSAnalyzer
 # from generate_resume import generate_pdf # Removed local generation
-from resume_parser import to_text, parse_text
+from resume_parser import to_text, parse_resume, IncrementalParser
+from resume_model import Resume, ValidationError
+from doc_cache import DocumentCache
 # from resume_extractor import extract_resume_content # Removed local extraction
 from daytona_orchestrator import DaytonaOrchestrator
+from ats_engine import ATSEngine
+from template_registry import DEFAULT_TEMPLATE, get_registry
 from werkzeug.utils import secure_filename
 
 app = Flask(__name__)
 # Initialize Daytona Orchestrator
 orchestrator = DaytonaOrchestrator()
+# Keyword ATS scoring runs in-process; only the LLM tier uses a worker
+ats_engine = ATSEngine(orchestrator)
+threading.Thread(target=ats_engine.warm_up, name="ats-warm-up", daemon=True).start()
+# Compiled resume templates for /api/preview_html; autoescaped like Flask's own templates
+preview_templates = get_registry('templates', autoescape=True)
+# Editor text is re-parsed on every preview and save; each user's parser only re-parses changed sections
+PARSER_CACHE_SIZE = int(os.environ.get("PARSER_CACHE_SIZE", "256"))
+editor_parsers = OrderedDict()
+editor_parsers_lock = threading.Lock()
+
+def parse_editor_text(user, text):
+    """parse_text() via the user's IncrementalParser. The result is shared with its cache: don't modify it."""
+    with editor_parsers_lock:
+        parser = editor_parsers.get(user)
+        if parser is None:
+            parser = editor_parsers[user] = IncrementalParser()
+            if len(editor_parsers) > PARSER_CACHE_SIZE:
+                editor_parsers.popitem(last=False)
+        else:
+            editor_parsers.move_to_end(user)
+    return parser.parse(text)
+
+# Parsed resume.yaml / style.json files, re-read only when a file's mtime or size changes
+DOC_CACHE_MAX_MB = int(os.environ.get("DOC_CACHE_MAX_MB", "32"))
+documents = DocumentCache(max_bytes=DOC_CACHE_MAX_MB * 1024 * 1024)
+
+def read_resume(path):
+    """The saved Resume, shared with the cache: don't modify it."""
+    return documents.load(path, Resume.from_yaml)
+
+def read_resume_text(path):
+    """to_text() of the saved resume, for the editor."""
+    return documents.derive(path, Resume.from_yaml, "text", to_text)
+
+def read_style(path):
+    """Saved style options, {} if there are none. Shared with the cache: don't modify them."""
+    if not os.path.exists(path):
+        return {}
+    return documents.load(path, json.loads)
+
+def invalidate_user_documents(user_dir):
+    # After writing resume.yaml or style.json, in case a rewrite kept the same mtime and size
+    for name in ("resume.yaml", "style.json"):
+        documents.invalidate(os.path.join(user_dir, name))
 
 app.config["SECRET_KEY"] = "super-secret-key-change-in-production"
 
@@ -22,11 +76,43 @@ app.config["SECRET_KEY"] = "super-secret-key-change-in-production"
 def health():
     status = {
         "status": "ok",
+        "backend": orchestrator.backend,
         "daytona": "connected" if orchestrator.daytona else "disconnected",
         "api_key_set": bool(orchestrator.api_key)
     }
     return jsonify(status)
 
+# Bearer token for the operational endpoints (pool stats, metrics). Unset: local requests only.
+OPS_TOKEN = os.environ.get("OPS_TOKEN", "")
+
+def ops_required(f):
+    """Operational endpoints: `Authorization: Bearer $OPS_TOKEN`, or a loopback client if no token is set."""
+    from functools import wraps
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if OPS_TOKEN:
+            scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+            if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), OPS_TOKEN.encode()):
+                return jsonify({"status": "error", "message": "Unauthorized"}), 401
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            return jsonify({"status": "error", "message": "Set OPS_TOKEN to use this endpoint remotely"}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+@app.route('/api/pool_stats')
+@ops_required
+def pool_stats():
+    stats = orchestrator.pool_stats()
+    stats["admission"] = admission.stats()
+    stats["documents"] = documents.stats()
+    return jsonify(stats)
+
+@app.route('/api/metrics')
+@ops_required
+def metrics():
+    # Prometheus text format: per-phase latency histograms, failure counters, pool gauges
+    return Response(orchestrator.metrics_text(), mimetype='text/plain; version=0.0.4')
+
 app.config["SESSION_TYPE"] = "filesystem"
 app.config["SESSION_PERMANENT"] = False
 # For localhost development, Secure must be False if not using HTTPS
@@ -37,6 +123,51 @@ CORS(app, supports_credentials=True)
 
 user_manager = UserManager()
 
+# Background jobs for the slow worker-backed endpoints (PDF generation, resume parsing)
+jobs = JobQueue(user_manager.get_user_dir, max_workers=int(os.environ.get("JOB_WORKERS", 4)))
+
+# Bounds worker-backed work globally and per user; excess requests get a fast 429
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get("ADMISSION_MAX_CONCURRENT", os.environ.get("WORKER_POOL_MAX_SIZE", 4))),
+    max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", 16)),
+    max_per_user=int(os.environ.get("ADMISSION_MAX_PER_USER", 3)),
+    queue_timeout=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 120)),
+)
+
+def admit(user):
+    """Admits worker-backed work for the user or raises AdmissionRejected / CircuitOpenError."""
+    retry_after = orchestrator.creation_retry_after()
+    if retry_after:
+        raise CircuitOpenError("Workers are unavailable right now, please try again shortly.", retry_after)
+    return admission.admit(user)
+
+def busy_response(e, **body):
+    """429 when the queue is full, 503 while sandbox creation is paused; both with Retry-After."""
+    response = jsonify(body)
+    response.status_code = 503 if isinstance(e, CircuitOpenError) else 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def submit_admitted(user, ticket, kind, func, *args):
+    """Queues a job that waits for its admission slot before it runs."""
+    try:
+        return jobs.submit(user, kind, run_admitted, ticket, func, *args)
+    except Exception:
+        admission.cancel(ticket)
+        raise
+
+@contextmanager
+def worker_slot(user):
+    """Admits and holds a run slot for worker-backed work done inside the request."""
+    ticket = admit(user)
+    with admission.slot(ticket):
+        yield
+
+def run_admitted(progress, ticket, func, *args):
+    progress("waiting")
+    with admission.slot(ticket):
+        return func(progress, *args)
+
 def get_current_user():
     return session.get("user")
 
@@ -87,10 +218,12 @@ def stash_jd():
     session['stashed_jd'] = data.get('text')
     return jsonify({"status": "success"})
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
 @app.route('/api/upload_resume', methods=['POST'])
 @login_required
 def upload_resume():
-    if not orchestrator.daytona:
+    if not orchestrator.available:
          return jsonify({"error": "Daytona SDK not connected. Check server logs."}), 503
 
     if 'file' not in request.files:
@@ -106,24 +239,53 @@ def upload_resume():
         # save_path = os.path.join(user_dir, filename)
         # file.save(save_path) # Don't save locally for privacy/worker pattern
         
-        # Read file content
-        file_content = file.read()
-        
+        # Read file content, hashing it on the way for the extraction cache
+        digest = hashlib.sha256()
+        chunks = []
+        for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            chunks.append(chunk)
+        file_content = b"".join(chunks)
+        digest = digest.hexdigest()
+
+        extracted_text = orchestrator.cached_extraction(digest, file.filename)
+        if extracted_text is not None:
+            # Same file extracted before: no job, no worker
+            try:
+                save_uploaded_resume(user_dir, extracted_text)
+            except Exception as e:
+                return jsonify({"error": f"Failed to parse resume: {str(e)}"}), 400
+            return jsonify({"status": "success", "text": extracted_text, "cached": True})
+
         try:
-            # Extract content via Worker Sandbox
-            extracted_text = orchestrator.parse_resume(file.filename, file_content)
-            
-            # Update resume.yaml
-            parsed_data = parse_text(extracted_text)
-            resume_path = os.path.join(user_dir, "resume.yaml")
-            with open(resume_path, 'w') as f:
-                yaml.dump(parsed_data, f, sort_keys=False)
-            return jsonify({"status": "success", "text": extracted_text})
-        except Exception as e:
-            return jsonify({"error": f"Failed to parse resume: {str(e)}"}), 500
+            ticket = admit(user)
+        except (AdmissionRejected, CircuitOpenError) as e:
+            return busy_response(e, error=str(e))
+
+        # Extract content via Worker Sandbox in the background
+        job_id = submit_admitted(user, ticket, "upload_resume", run_upload_job, user_dir, file.filename, file_content, digest)
+        return jsonify({"status": "queued", "job_id": job_id}), 202
             
     return jsonify({"error": "Invalid file type"}), 400
 
+def run_upload_job(progress, user_dir, filename, file_content, digest):
+    try:
+        # The request already missed the extraction cache; the result is stored in it
+        extracted_text = orchestrator.parse_resume(filename, file_content, progress=progress, digest=digest, check_cache=False)
+    except Exception as e:
+        raise Exception(f"Failed to parse resume: {str(e)}")
+
+    save_uploaded_resume(user_dir, extracted_text)
+    return {"text": extracted_text}
+
+def save_uploaded_resume(user_dir, extracted_text):
+    # Update resume.yaml
+    resume = parse_resume(extracted_text)
+    resume_path = os.path.join(user_dir, "resume.yaml")
+    with open(resume_path, 'w') as f:
+        resume.to_yaml(f)
+    invalidate_user_documents(user_dir)
+
 @app.route('/dashboard')
 @login_required
 def dashboard():
@@ -135,9 +297,7 @@ def dashboard():
     resume_text = ""
     if os.path.exists(resume_path):
         try:
-            with open(resume_path, 'r') as f:
-                data = yaml.safe_load(f) or {}
-                resume_text = to_text(data)
+            resume_text = read_resume_text(resume_path)
         except Exception:
             resume_text = "# Error loading resume"
             
@@ -150,13 +310,10 @@ def dashboard():
     
     # Load style
     style_path = os.path.join(user_dir, "style.json")
-    saved_style = {}
-    if os.path.exists(style_path):
-        try:
-            with open(style_path, 'r') as f:
-                saved_style = json.load(f)
-        except:
-            pass
+    try:
+        saved_style = read_style(style_path)
+    except:
+        saved_style = {}
     
     return render_template('dashboard.html', user=user, resume_text=resume_text, pdfs=pdfs, stashed_jd=stashed_jd, saved_style=saved_style)
 
@@ -170,25 +327,25 @@ def preview_html():
     style = request.json.get('style', {}) # Get style options
     
     try:
+        # Templates read the Resume directly, no conversion to dicts
         if text_content:
-            data = parse_text(text_content)
+            data = Resume.from_dict(parse_editor_text(user, text_content))
         else:
             # Fallback to saved file
-            resume_path = os.path.join(user_dir, "resume.yaml")
-            with open(resume_path, 'r') as f:
-                data = yaml.safe_load(f)
+            data = read_resume(os.path.join(user_dir, "resume.yaml"))
                 
-        # Render template
-        from flask import render_template_string
-        
-        # Read template file
-        template_path = os.path.join('templates', 'resume.html')
-        with open(template_path, 'r') as f:
-            template_content = f.read()
-            
-        # Render with style
-        html = render_template_string(template_content, resume=data, style=style)
-        return jsonify({"status": "success", "html": html})
+        template_name = request.json.get('template', DEFAULT_TEMPLATE)
+        hashes = preview_templates.section_hashes(template_name, data, style)
+        # Section hashes the client already shows; only changed sections are sent back
+        known = request.json.get('sections')
+        if isinstance(known, dict) and set(known) == set(hashes):
+            changed = [block for block, digest in hashes.items() if known[block] != digest]
+            fragments = preview_templates.render_sections(template_name, changed, resume=data, style=style)
+            return jsonify({"status": "success", "sections": hashes, "fragments": fragments})
+
+        # Render with style; the template is compiled once and reused until it changes
+        html = preview_templates.render(template_name, resume=data, style=style)
+        return jsonify({"status": "success", "html": html, "sections": hashes})
         
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 400
@@ -204,15 +361,16 @@ def update_resume():
     
     try:
         # Parse Text to Dict
-        data = parse_text(text_content)
+        resume = Resume.from_dict(parse_editor_text(user, text_content))
         
         # Save as YAML
         with open(os.path.join(user_dir, "resume.yaml"), 'w') as f:
-            yaml.dump(data, f, sort_keys=False)
+            resume.to_yaml(f)
             
         # Save Style
         with open(os.path.join(user_dir, "style.json"), 'w') as f:
             json.dump(style, f)
+        invalidate_user_documents(user_dir)
             
         return jsonify({"status": "success"})
     except Exception as e:
@@ -221,30 +379,36 @@ def update_resume():
 @app.route('/api/analyze_ats', methods=['POST'])
 @login_required
 def analyze_ats():
-    if not orchestrator.daytona:
-         return jsonify({"status": "error", "message": "Daytona SDK not connected."}), 503
-
     user = get_current_user()
     user_dir = user_manager.get_user_dir(user)
     
     # Get inputs
     resume_text = request.json.get('resume_text')
     job_desc = request.json.get('job_desc')
+    # LLM feedback needs a worker and takes much longer, so only on request
+    use_llm = bool(request.json.get('deep'))
     
     if not resume_text or not job_desc:
         return jsonify({"status": "error", "message": "Missing resume text or job description"}), 400
+
+    if use_llm and not orchestrator.available:
+         return jsonify({"status": "error", "message": "Daytona SDK not connected."}), 503
         
     try:
-        # Run ATS Analysis via Worker Sandbox
-        result = orchestrator.analyze_ats(resume_text, job_desc)
+        # Tiers that hold a worker (LLM, or keywords without NLTK data here) go through
+        # admission like the job endpoints; the in-process tier never waits for it
+        result = ats_engine.analyze(resume_text, job_desc, use_llm=use_llm,
+                                    worker_slot=lambda: worker_slot(user))
         return jsonify({"status": "success", "analysis": result})
+    except (AdmissionRejected, CircuitOpenError) as e:
+        return busy_response(e, status="error", message=str(e))
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/generate', methods=['POST'])
 @login_required
 def generate():
-    if not orchestrator.daytona:
+    if not orchestrator.available:
          return jsonify({"status": "error", "message": "Daytona SDK not connected."}), 503
 
     user = get_current_user()
@@ -255,6 +419,41 @@ def generate():
     resume_path = os.path.join(user_dir, "resume.yaml")
     style_path = os.path.join(user_dir, "style.json")
     
+    try:
+        # A resume that isn't a mapping fails here, before it takes a worker
+        data = read_resume(resume_path).to_dict()
+        style = read_style(style_path)
+    except ValidationError as e:
+        return jsonify({"status": "error", "message": f"Invalid resume: {e}"}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    filename = reserve_pdf_filename(user, user_dir, keywords)
+    if orchestrator.cached_pdf(data, os.path.join(user_dir, filename), style):
+        # Identical render already on disk: no job, no worker
+        save_pdf_snapshot(user_dir, filename, data, style)
+        release_pdf_filenames(user_dir, [filename])
+        return jsonify({"status": "success", "filename": filename, "cached": True})
+
+    try:
+        ticket = admit(user)
+    except (AdmissionRejected, CircuitOpenError) as e:
+        release_pdf_filenames(user_dir, [filename])
+        return busy_response(e, status="error", message=str(e))
+
+    try:
+        job_id = submit_admitted(user, ticket, "generate", run_generate_job, user_dir, filename, data, style)
+    except Exception as e:
+        # The job never started, so it won't release the name itself
+        release_pdf_filenames(user_dir, [filename])
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return jsonify({"status": "queued", "job_id": job_id}), 202
+
+# Filenames handed to queued jobs that have not written their PDF yet
+_reserved_pdfs = set()
+_reserved_lock = threading.Lock()
+
+def reserve_pdf_filename(user, user_dir, keywords):
     # Filename logic
     from datetime import datetime
     date_str = datetime.now().strftime("%Y-%m-%d")
@@ -262,58 +461,144 @@ def generate():
     base_filename = f"{user}_Resume{kw_part}_{date_str}"
     
     # Handle duplicates
-    counter = 0
-    filename = f"{base_filename}.pdf"
-    while os.path.exists(os.path.join(user_dir, filename)):
-        counter += 1
-        filename = f"{base_filename}_{counter}.pdf"
-    
-    output_path = os.path.join(user_dir, filename)
-    snapshot_path = os.path.join(user_dir, filename.replace('.pdf', '.json'))
-    
+    with _reserved_lock:
+        counter = 0
+        filename = f"{base_filename}.pdf"
+        while os.path.exists(os.path.join(user_dir, filename)) or os.path.join(user_dir, filename) in _reserved_pdfs:
+            counter += 1
+            filename = f"{base_filename}_{counter}.pdf"
+        _reserved_pdfs.add(os.path.join(user_dir, filename))
+    return filename
+
+def release_pdf_filenames(user_dir, filenames):
+    with _reserved_lock:
+        for filename in filenames:
+            _reserved_pdfs.discard(os.path.join(user_dir, filename))
+
+def save_pdf_snapshot(user_dir, filename, data, style):
+    # Save Snapshot (Data + Style)
+    with open(os.path.join(user_dir, filename.replace('.pdf', '.json')), 'w') as f:
+        json.dump({"data": data, "style": style}, f)
+
+def run_generate_job(progress, user_dir, filename, data, style):
     try:
-        with open(resume_path, 'r') as f:
-            data = yaml.safe_load(f)
-            
-        style = {}
-        if os.path.exists(style_path):
-            with open(style_path, 'r') as f:
-                style = json.load(f)
-            
-        # Generate via Worker Sandbox
-        # generate_pdf(data, output_path, template_dir='templates', style=style)
-        
-        # We need to pass data and style to orchestrator
-        # The orchestrator currently only takes data. I should update it to take style too if needed,
-        # but generate_resume.py takes yaml data. We can merge style into data or update generate_resume.py
-        # For now, let's assume style is handled by merging it into the data or the script handles it.
-        # Actually generate_resume.py in current state takes data and uses 'style' var but only from args or hardcoded?
-        # Let's check generate_resume.py again. It accepts --data.
-        # It renders with `style=style or {}`.
-        # So we should pass style in the yaml or update generate_resume.py to take style file.
-        # For simplicity, let's update data to include style under a '_style' key if the template supports it,
-        # or just stick to basic generation for now.
-        # Wait, the user requirement is "Generating the final PDF".
-        # I'll update orchestrator to pass style if I can, but let's just get basic generation working first.
-        
-        pdf_content = orchestrator.generate_pdf(data)
-        
-        # Save the returned PDF content
-        with open(output_path, 'wb') as f:
-            f.write(pdf_content)
-        
-        # Save Snapshot (Data + Style)
-        snapshot_data = {
-            "data": data,
-            "style": style
-        }
-        with open(snapshot_path, 'w') as f:
-            json.dump(snapshot_data, f)
-        
-        return jsonify({"status": "success", "filename": filename})
+        # Generate via Worker Sandbox; the render cache was already checked by the request
+        # The PDF is streamed straight into the user's directory
+        orchestrator.generate_pdf(data, os.path.join(user_dir, filename), style=style, progress=progress, check_cache=False)
+        save_pdf_snapshot(user_dir, filename, data, style)
+        return {"filename": filename}
+    finally:
+        release_pdf_filenames(user_dir, [filename])
+
+# Upper bound on variants per batch request
+MAX_BATCH_VARIANTS = int(os.environ.get("MAX_BATCH_VARIANTS", 10))
+
+@app.route('/api/generate_batch', methods=['POST'])
+@login_required
+def generate_batch():
+    """
+    Generates several tailored PDFs in one worker session.
+    Body: {"variants": [{"keywords": "...", "data": {...}, "style": {...}}, ...]}.
+    `data` and `style` default to the saved resume and style.
+    """
+    if not orchestrator.available:
+         return jsonify({"status": "error", "message": "Daytona SDK not connected."}), 503
+
+    user = get_current_user()
+    user_dir = user_manager.get_user_dir(user)
+    variants = (request.json or {}).get('variants') or []
+    if not isinstance(variants, list) or not variants:
+        return jsonify({"status": "error", "message": "No variants given"}), 400
+    if len(variants) > MAX_BATCH_VARIANTS:
+        return jsonify({"status": "error", "message": f"At most {MAX_BATCH_VARIANTS} variants per batch"}), 400
+
+    resume_path = os.path.join(user_dir, "resume.yaml")
+    style_path = os.path.join(user_dir, "style.json")
+
+    try:
+        saved_data = None
+        if os.path.exists(resume_path):
+            saved_data = read_resume(resume_path)
+
+        saved_style = read_style(style_path)
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+    batch = []
+    for variant in variants:
+        if not isinstance(variant, dict):
+            return jsonify({"status": "error", "message": "Each variant must be an object"}), 400
+        data = variant.get('data', saved_data)
+        if data is None:
+            return jsonify({"status": "error", "message": "No resume data saved"}), 400
+        try:
+            data = Resume.from_dict(data).to_dict()
+        except ValidationError as e:
+            return jsonify({"status": "error", "message": f"Invalid resume: {e}"}), 400
+        batch.append((data, variant.get('style') or saved_style, variant.get('keywords', '')))
+
+    try:
+        ticket = admit(user)
+    except (AdmissionRejected, CircuitOpenError) as e:
+        return busy_response(e, status="error", message=str(e))
+
+    filenames = []
+    try:
+        for _, _, keywords in batch:
+            filenames.append(reserve_pdf_filename(user, user_dir, keywords))
+        job_id = submit_admitted(user, ticket, "generate_batch", run_generate_batch_job, user_dir, filenames, batch)
+    except Exception as e:
+        # The job never started, so it won't release the names itself
+        admission.cancel(ticket)
+        release_pdf_filenames(user_dir, filenames)
+        return jsonify({"status": "error", "message": str(e)}), 500
+    return jsonify({"status": "queued", "job_id": job_id, "filenames": filenames}), 202
+
+def run_generate_batch_job(progress, user_dir, filenames, batch):
+    output_paths = [os.path.join(user_dir, filename) for filename in filenames]
+    try:
+        results = orchestrator.generate_pdfs([(data, style) for data, style, _ in batch], output_paths, progress=progress)
+
+        files = []
+        errors = []
+        for filename, (data, style, _), result in zip(filenames, batch, results):
+            if "error" in result:
+                errors.append({"filename": filename, "error": result["error"]})
+                continue
+            save_pdf_snapshot(user_dir, filename, data, style)
+            files.append(filename)
+
+        if not files:
+            raise Exception(f"All {len(batch)} variants failed: {errors[0]['error']}")
+        return {"files": files, "errors": errors}
+    finally:
+        release_pdf_filenames(user_dir, filenames)
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = jobs.get(get_current_user(), job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+    return jsonify({"status": "success", "job": job})
+
+@app.route('/api/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    """Server-sent events with the job state on every stage change."""
+    user = get_current_user()
+    if jobs.get(user, job_id) is None:
+        return jsonify({"status": "error", "message": "Job not found"}), 404
+
+    def stream():
+        for job in jobs.events(user, job_id):
+            if job is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(job)}\n\n"
+
+    return Response(stream(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.route('/api/delete_pdf', methods=['POST'])
 @login_required
 def delete_pdf():
@@ -358,18 +643,19 @@ def restore_version():
         with open(json_path, 'r') as f:
             snapshot = json.load(f)
             
-        data = snapshot.get('data')
+        resume = Resume.from_dict(snapshot.get('data'))
         style = snapshot.get('style', {})
         
         # Convert data to text
-        text_content = to_text(data)
+        text_content = to_text(resume)
         
         # Overwrite current resume.yaml and style.json
         with open(os.path.join(user_dir, "resume.yaml"), 'w') as f:
-            yaml.dump(data, f, sort_keys=False)
+            resume.to_yaml(f)
             
         with open(os.path.join(user_dir, "style.json"), 'w') as f:
             json.dump(style, f)
+        invalidate_user_documents(user_dir)
             
         return jsonify({
             "status": "success", 
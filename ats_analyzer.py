@@ -15,6 +15,15 @@ try:
 except LookupError:
     nltk.download('stopwords')
 
+_stop_words = None
+
+def get_stop_words():
+    """English stopwords, read from the NLTK corpus once per process."""
+    global _stop_words
+    if _stop_words is None:
+        _stop_words = frozenset(stopwords.words('english'))
+    return _stop_words
+
 def analyze_keywords(resume_text, job_desc_text):
     """
     Analyzes the resume against the job description using NLTK.
@@ -23,7 +32,7 @@ def analyze_keywords(resume_text, job_desc_text):
     resume_tokens = set(word_tokenize(resume_text.lower()))
     job_tokens = set(word_tokenize(job_desc_text.lower()))
     
-    stop_words = set(stopwords.words('english'))
+    stop_words = get_stop_words()
     
     # Filter stopwords and non-alphanumeric
     resume_keywords = {w for w in resume_tokens if w.isalnum() and w not in stop_words}
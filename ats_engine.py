@@ -0,0 +1,75 @@
+import threading
+import time
+from contextlib import nullcontext
+
+
+class ATSEngine:
+    """
+    Tiered ATS analysis.
+
+    Tier 1 ("keywords") runs `ats_analyzer.analyze_keywords` in the app process:
+    a set intersection over NLTK tokens that takes milliseconds once NLTK is
+    loaded. Tier 2 ("llm") adds Ollama feedback and needs a worker, so it only
+    runs when the caller asks for it. If NLTK data is missing in the app
+    environment, keyword scoring goes to a worker instead ("keywords_worker").
+    """
+
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+        self._lock = threading.Lock()
+        self._analyzer = None
+        self._local_unavailable = None
+
+    def warm_up(self):
+        """Loads NLTK and its data ahead of the first request. Safe to call from a background thread."""
+        try:
+            analyzer = self._load()
+            analyzer.get_stop_words()
+            analyzer.analyze_keywords("warm up", "warm up")
+        except Exception as e:
+            self._local_unavailable = f"{type(e).__name__}: {e}"
+            print(f"In-process ATS keyword tier unavailable, using workers: {e}")
+
+    def analyze(self, resume_text, job_desc_text, use_llm=False, worker_slot=None):
+        """
+        Returns the keyword analysis plus `tier` (which tier answered) and `timings`
+        (milliseconds per tier that ran). With use_llm the result also has `ollama_feedback`.
+
+        `worker_slot()`, if given, returns a context manager held around every worker
+        call (the app's admission slot); whatever it raises is passed to the caller.
+        """
+        timings = {}
+        analysis = None
+        tier = "keywords"
+
+        if self._local_unavailable is None:
+            started = time.time()
+            try:
+                with self.orchestrator.metrics.timer("ats", tier="keywords"):
+                    analysis = self._load().analyze_keywords(resume_text, job_desc_text)
+            except LookupError as e:
+                # NLTK data not installed here; the worker image has it
+                self._local_unavailable = f"{type(e).__name__}: {e}"
+                print(f"In-process ATS keyword tier unavailable, using workers: {e}")
+            timings["keywords_ms"] = round((time.time() - started) * 1000, 2)
+
+        if use_llm or analysis is None:
+            tier = "llm" if use_llm else "keywords_worker"
+            with worker_slot() if worker_slot else nullcontext():
+                started = time.time()
+                with self.orchestrator.metrics.timer("ats", tier=tier):
+                    analysis = self.orchestrator.analyze_ats(resume_text, job_desc_text, use_llm=use_llm)
+            timings[f"{tier}_ms"] = round((time.time() - started) * 1000, 2)
+
+        analysis = dict(analysis)
+        analysis["tier"] = tier
+        analysis["timings"] = timings
+        return analysis
+
+    def _load(self):
+        # Imported on first use: NLTK adds about a second to app startup otherwise
+        with self._lock:
+            if self._analyzer is None:
+                import ats_analyzer
+                self._analyzer = ats_analyzer
+            return self._analyzer
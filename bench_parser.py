@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from resume_parser import to_text, parse_text, IncrementalParser
+
+# Synthetic resumes: `size` is the number of experience entries, the other sections scale with it
+SIZES = {"small": 2, "medium": 20, "large": 200, "xlarge": 2000}
+BASELINE_PATH = 'bench_parser_baseline.json'
+
+WORDS = ["built", "led", "API", "latency", "p99", "Kubernetes", "C++", "team", "40%", "reduced",
+         "pipeline", "Python", "migrated", "on-call", "(OSS)", "déploiement", "SLA: 99.9", "data/ML"]
+
+
+def _phrase(rng, low=2, high=12):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def synthetic_resume(size, seed=0):
+    """
+    A resume dict that to_text() and parse_text() round-trip exactly.
+
+    All values are non-empty single-line strings without surrounding whitespace,
+    and every section has the shape parse_text() builds (education entries have
+    no bullets, the other entries always have a bullets list).
+    """
+    rng = random.Random(seed)
+    return {
+        'name': f"Jane Doe {seed}",
+        'contact': {
+            'email': f"jane{seed}@example.com",
+            'phone': "+1 555 0100",
+            'location': "New York, NY",
+            'linkedin': "linkedin.com/in/jane",
+            'portfolio_url': "https://jane.dev",
+        },
+        'education': [
+            {'institution': f"University {i}", 'degree': "B.S. Computer Science", 'gpa': "3.9",
+             'date': "2016 - 2020", 'coursework': _phrase(rng)}
+            for i in range(max(1, size // 10))
+        ],
+        'technical_skills': [
+            {'category': f"Category {i}", 'skills': ", ".join(rng.sample(WORDS, 5))}
+            for i in range(max(1, size // 5))
+        ],
+        'experience': [
+            {'company': f"Company {i}", 'bullets': [_phrase(rng) for _ in range(rng.randint(1, 6))],
+             'role': "Software Engineer", 'location': "Remote", 'date': "Jan 2021 - Present"}
+            for i in range(size)
+        ],
+        'projects': [
+            {'name': f"Project {i}", 'bullets': [_phrase(rng) for _ in range(2)], 'date': "2022"}
+            for i in range(max(1, size // 4))
+        ],
+        'extracurricular': {
+            'bullets': [_phrase(rng) for _ in range(max(1, size // 10))],
+            'research_papers': [{'title': f"Paper {i}", 'venue': "NeurIPS", 'date': "2023"} for i in range(2)],
+        },
+    }
+
+
+def check_round_trip(sizes, seeds):
+    """parse_text(to_text(d)) == d for every size and seed. Returns a list of failure messages."""
+    failures = []
+    for label, size in sizes.items():
+        for seed in range(seeds):
+            data = synthetic_resume(size, seed)
+            parsed = parse_text(to_text(data))
+            if parsed != data:
+                keys = [key for key in data if parsed.get(key) != data[key]] or sorted(set(parsed) ^ set(data))
+                failures.append(f"{label} seed {seed}: sections differ: {', '.join(keys)}")
+    return failures
+
+
+# Fixed pure-Python workload timed alongside every case. Baselines compare throughput
+# relative to it, so a faster or busier machine doesn't read as a change in the parser.
+REFERENCE_TEXT = " ".join(WORDS * 50)
+
+
+def _reference(_):
+    counts = {}
+    for word in REFERENCE_TEXT.split():
+        counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+def _loop_time(func, arg, number):
+    started = time.perf_counter()
+    for _ in range(number):
+        func(arg)
+    return time.perf_counter() - started
+
+
+def _calibrate(func, arg, min_time):
+    # Calls per timing round so that one round takes about min_time / 7
+    number = 1
+    while _loop_time(func, arg, number) < min_time / 7:
+        number *= 2
+    return number
+
+
+def _measure(func, arg, min_time):
+    """
+    Best-of-7 throughput in ops/sec, its ratio to the reference workload, and the
+    peak traced memory of one call in KiB. Each round times the case and then the
+    reference, and the ratio is the median over the rounds, so load changes during
+    the run mostly cancel out.
+    """
+    func(arg)
+    number = _calibrate(func, arg, min_time)
+    reference_number = _calibrate(_reference, None, min_time)
+    times = []
+    ratios = []
+    for _ in range(7):
+        elapsed = _loop_time(func, arg, number)
+        reference_elapsed = _loop_time(_reference, None, reference_number)
+        times.append(elapsed)
+        ratios.append((number / elapsed) / (reference_number / reference_elapsed))
+
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ops_per_sec": round(number / min(times), 1),
+        "relative": round(statistics.median(ratios), 4),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _edit_one_section(text):
+    # The editor's common case: one line of a small section changed, every other section reused
+    return text.replace("Phone: +1 555 0100", "Phone: +1 555 0199", 1)
+
+
+def run_benchmarks(sizes, min_time=1.0, only=None):
+    """Measures every case for every size, or just the "<case>/<size>" names in `only`."""
+    results = {}
+    for label, size in sizes.items():
+        data = synthetic_resume(size)
+        text = to_text(data)
+        edited = [text, _edit_one_section(text)]
+        parser = IncrementalParser()
+        calls = iter(range(sys.maxsize))
+
+        def parse_incremental(_):
+            # Alternates between two texts that differ in one contact line
+            return parser.parse(edited[next(calls) % 2])
+
+        cases = {
+            "to_text": (to_text, data),
+            "parse_text": (parse_text, text),
+            "parse_incremental": (parse_incremental, None),
+        }
+        for case, (func, arg) in cases.items():
+            name = f"{case}/{label}"
+            if only is not None and name not in only:
+                continue
+            result = _measure(func, arg, min_time)
+            result["lines"] = text.count("\n") + 1
+            results[name] = result
+            print(f"{name:28s} {result['lines']:7d} lines {result['ops_per_sec']:12.1f} ops/s {result['relative']:9.4f}x ref {result['peak_kib']:10.1f} KiB peak")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against the baseline, as (name, message): slower or more memory than `tolerance` allows."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["relative"] < base["relative"] * (1 - tolerance):
+            regressions.append((name, f"{result['relative']}x the reference workload, baseline {base['relative']}x"
+                                f" ({result['ops_per_sec']} vs. {base['ops_per_sec']} ops/s)"))
+        if result["peak_kib"] > base["peak_kib"] * (1 + tolerance):
+            regressions.append((name, f"{result['peak_kib']} KiB peak, baseline {base['peak_kib']}"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Round-trip check and benchmarks for to_text/parse_text.')
+    parser.add_argument('--sizes', type=str, default=",".join(SIZES), help=f'Comma separated sizes to run ({", ".join(SIZES)})')
+    parser.add_argument('--seeds', type=int, default=20, help='Synthetic resumes per size for the round-trip check')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds to spend timing each case')
+    parser.add_argument('--baseline', type=str, default=BASELINE_PATH, help='Baseline results file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown or memory growth vs. the baseline (0.25 = 25%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results to the baseline file')
+    parser.add_argument('--check-only', action='store_true', help='Only run the round-trip check')
+    args = parser.parse_args()
+
+    sizes = {label: SIZES[label] for label in args.sizes.split(',')}
+
+    failures = check_round_trip(sizes, args.seeds)
+    for failure in failures:
+        print(f"Round trip failed: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"Round trip OK for {len(sizes) * args.seeds} synthetic resumes.")
+    if args.check_only:
+        return
+
+    results = run_benchmarks(sizes, min_time=args.min_time)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one.")
+        return
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+        # A busy machine can slow down a single run: only report what is slow twice in a row
+        print("Re-measuring possible regressions...")
+        rerun = run_benchmarks(sizes, min_time=args.min_time, only={name for name, _ in regressions})
+        regressions = compare(rerun, baseline["results"], args.tolerance)
+    for name, message in regressions:
+        print(f"Regression: {name}: {message}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {args.baseline} (Python {baseline['python']}, {baseline['machine']}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,67 @@
 import os
 import json
+import socket
+import atexit
 import time
-from daytona_sdk import Daytona, DaytonaConfig, CreateSandboxBaseParams
+import base64
+import hashlib
+import uuid
+import functools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from daytona_sdk import Daytona, DaytonaConfig, CreateSandboxBaseParams, CreateSandboxFromSnapshotParams, CreateSnapshotParams, ListSandboxesQuery
+from sandbox_pool import SandboxPool
+from sandbox_reaper import SandboxReaper
+from admission import CircuitBreaker
+from hedging import Hedger
+from render_cache import RenderCache
+from extraction_cache import ExtractionCache
+from sandbox_transfer import SandboxTransfer
+from worker_environment import WorkerEnvironment
+from local_executor import LocalExecutor
+from metrics import Metrics
+from worker_daemon import DEFAULT_SOCKET as DAEMON_SOCKET, EXIT_UNAVAILABLE
+
+# Application code shipped to workers. Only these are kept in the worker's blob store
+# between jobs; user data is always re-sent and wiped with the job directory.
+APP_FILES = (
+    'worker_extractor.py',
+    'resume_extractor.py',
+    'generate_resume.py',
+    'template_registry.py',
+    'templates/resume.html',
+    'ats_analyzer.py',
+    'worker_daemon.py',
+)
+
+# Code loaded by the resident worker daemon, kept in its own directory on the worker
+DAEMON_FILES = (
+    'worker_daemon.py',
+    'resume_extractor.py',
+    'generate_resume.py',
+    'template_registry.py',
+    'ats_analyzer.py',
+    'templates/resume.html',
+)
+DAEMON_DIR = '.rb_app'
+
+# Files needed to render a PDF with generate_resume.py
+RENDER_FILES = ('generate_resume.py', 'template_registry.py', 'templates/resume.html')
+# Files needed to extract resume text with worker_extractor.py
+EXTRACT_FILES = ('worker_extractor.py', 'resume_extractor.py')
+DAEMON_START_TIMEOUT = 60
+
+# Seconds to wait before checking for / building the worker snapshot again after a failure
+SNAPSHOT_RETRY_INTERVAL = 600
+
+# Label on every worker sandbox this app creates, plus the owner labels set in __init__.
+# The orphan sweep only ever touches sandboxes carrying it.
+WORKER_LABEL = "resumebuilder-worker"
+
+# Identifies sandboxes created by this process
+INSTANCE_TOKEN = uuid.uuid4().hex
 
 # Configuration
 # REPO_URL = "https://github.com/daytonaio/sample-python-flask" # Placeholder, ideally use current repo if public or accessible
@@ -11,268 +71,855 @@ from daytona_sdk import Daytona, DaytonaConfig, CreateSandboxBaseParams
 # We will assume the worker sandbox can clone the same repo or we upload the necessary scripts.
 # Uploading scripts is safer if the repo is private/local changes.
 
+class DaemonUnavailableError(Exception):
+    """Raised when the resident worker daemon can't be reached."""
+
+
+class WorkerCommandError(Exception):
+    """Raised when a command in the worker exits with a non-zero code."""
+
+
+def timed_job(kind):
+    """Records the whole job method as phase "job" with the given kind."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer("job", kind=kind, backend=self.backend):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _upload_key(digest, file_path):
+    # The same bytes extract differently as a .pdf and as a .docx
+    return f"{digest}{os.path.splitext(file_path)[1].lower()}"
+
+
 class DaytonaOrchestrator:
-    def __init__(self):
+    def __init__(self, daytona=None):
+        # Per-phase latency histograms and failure counters, served on /api/metrics
+        self.metrics = Metrics()
+        self.metrics.describe("phase_duration_seconds", "Duration of orchestrator phases (create, install, upload, exec, download, delete, ...)")
+        self.metrics.describe("phase_failures_total", "Failed orchestrator phases by exception type")
+        self.metrics.describe("create_hedged_total", "Sandbox creations that started a second, hedged create")
+        self.metrics.describe("create_hedge_won_total", "Hedged creations where the second create finished first")
         self.api_key = os.environ.get("DAYTONA_API_KEY")
-        self.daytona = None
+        self.daytona = daytona
         # Default to the user's repo for consistency
         self.target_repo = os.environ.get("DAYTONA_TARGET_REPO", "https://github.com/birlaaishwarya11/ResumeBuilder.git")
-        
-        if self.api_key:
+
+        # Prebuilt worker snapshot. WORKER_SNAPSHOT pins an existing snapshot instead of the manifest hash.
+        self.environment = WorkerEnvironment()
+        self.snapshot_enabled = os.environ.get("WORKER_SNAPSHOT_ENABLED", "1") != "0"
+        self.snapshot_name = os.environ.get("WORKER_SNAPSHOT") or self.environment.snapshot_name()
+        self.snapshot_ready = False
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_checked_at = 0
+        self.startup_times = {"snapshot": deque(maxlen=200), "install": deque(maxlen=200)}
+
+        self.transfer = SandboxTransfer()
+
+        # Rendered PDFs by content hash; RENDER_CACHE_MAX_MB=0 turns the cache off
+        self.render_cache = None
+        cache_mb = float(os.environ.get("RENDER_CACHE_MAX_MB", 256))
+        if cache_mb > 0:
+            renderer = hashlib.sha256(b"".join(self._app_files(*RENDER_FILES).values())).hexdigest()[:12]
+            self.render_cache = RenderCache(
+                os.environ.get("RENDER_CACHE_DIR", os.path.join("cache", "renders")),
+                max_bytes=int(cache_mb * 1024 * 1024),
+                renderer_version=f"{renderer}-{self.environment.snapshot_name()}",
+            )
+
+        # Extracted text of earlier uploads by content hash; EXTRACTION_CACHE_MAX_ENTRIES=0 turns the cache off
+        self.extraction_cache = None
+        cache_entries = int(os.environ.get("EXTRACTION_CACHE_MAX_ENTRIES", 1000))
+        if cache_entries > 0:
+            extractor = hashlib.sha256(b"".join(self._app_files(*EXTRACT_FILES).values())).hexdigest()[:12]
+            self.extraction_cache = ExtractionCache(
+                os.environ.get("EXTRACTION_CACHE_DB", os.path.join("cache", "extractions.db")),
+                extractor_version=f"{extractor}-{self.environment.snapshot_name()}",
+                max_entries=cache_entries,
+                max_age=float(os.environ.get("EXTRACTION_CACHE_MAX_AGE_DAYS", 30)) * 86400,
+            )
+
+        # Resident worker daemon, reused by every job on the same sandbox. WORKER_DAEMON=0 runs one script per job.
+        self.use_daemon = os.environ.get("WORKER_DAEMON", "1") != "0"
+        self._daemons = {}
+        self._daemons_lock = threading.Lock()
+
+        # Background teardown of sandboxes plus a periodic sweep for ones leaked by crashed processes
+        self.worker_labels = {
+            "app": WORKER_LABEL,
+            "owner_host": socket.gethostname(),
+            "owner_pid": str(os.getpid()),
+            "owner_token": INSTANCE_TOKEN,
+        }
+        self._live_sandboxes = set()
+        self._creating = 0
+        self._live_lock = threading.Lock()
+        max_lifetime = float(os.environ.get("WORKER_MAX_LIFETIME", 3600))
+        # Pooled workers never live longer than max_lifetime, so anything much older is abandoned
+        self.orphan_max_age = float(os.environ.get("WORKER_ORPHAN_MAX_AGE", max_lifetime * 3 if max_lifetime else 6 * 3600))
+        self.reaper = SandboxReaper(
+            delete=self._delete_sandbox,
+            find_orphans=self.find_orphan_sandboxes,
+            max_concurrent=int(os.environ.get("REAPER_CONCURRENCY", 2)),
+            max_attempts=int(os.environ.get("REAPER_MAX_ATTEMPTS", 5)),
+            sweep_interval=float(os.environ.get("REAPER_SWEEP_INTERVAL", 300)),
+        )
+
+        # Stops hammering Daytona with create calls while it keeps failing
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5)),
+            reset_timeout=float(os.environ.get("BREAKER_RESET_TIMEOUT", 30)),
+        )
+
+        # Races a second create against one that runs past the usual p95 (off unless WORKER_HEDGE_PERCENTILE is set)
+        self.hedger = Hedger(
+            percentile=float(os.environ.get("WORKER_HEDGE_PERCENTILE", 0)),
+            min_samples=int(os.environ.get("WORKER_HEDGE_MIN_SAMPLES", 20)),
+            budget=float(os.environ.get("WORKER_HEDGE_BUDGET", 0.1)),
+            on_event=lambda event, mode: self.metrics.inc(f"create_{event}_total", mode=mode),
+        )
+
+        # Warm worker pool. Set WORKER_POOL_IDLE_TIMEOUT=0 to go back to one sandbox per job.
+        self.pool = SandboxPool(
+            provision=self.create_worker_sandbox,
+            destroy=self.cleanup_worker,
+            health_check=self.check_worker,
+            min_size=int(os.environ.get("WORKER_POOL_MIN_SIZE", 1)),
+            max_size=int(os.environ.get("WORKER_POOL_MAX_SIZE", 4)),
+            idle_timeout=float(os.environ.get("WORKER_POOL_IDLE_TIMEOUT", 600)),
+            health_check_interval=float(os.environ.get("WORKER_POOL_HEALTH_INTERVAL", 60)),
+            lease_timeout=float(os.environ.get("WORKER_POOL_LEASE_TIMEOUT", 120)),
+            max_lifetime=max_lifetime,
+        )
+
+        # Execution backend: "daytona", "local" (process pool on this machine) or "auto"
+        # (Daytona when an API key or client is available, local otherwise).
+        self.backend = os.environ.get("WORKER_BACKEND", "auto")
+        self.executor = None
+        if self.backend == "local" or (self.backend == "auto" and self.daytona is None and not self.api_key):
+            self.backend = "local"
+            self.executor = LocalExecutor(
+                max_workers=int(os.environ.get("LOCAL_WORKERS", 0)) or None,
+                task_timeout=float(os.environ.get("LOCAL_TASK_TIMEOUT", 120)),
+                memory_limit_mb=int(os.environ.get("LOCAL_MEMORY_LIMIT_MB", 1024)),
+            )
+            print(f"Using local execution backend ({self.executor.max_workers} worker processes).")
+            return
+        self.backend = "daytona"
+
+        if self.daytona is not None:
+            # Client injected (e.g. a fake for tests)
+            self._start_background()
+        elif self.api_key:
             try:
                 self.daytona = Daytona()
                 print("Daytona SDK Initialized successfully.")
+                self._start_background()
             except Exception as e:
                 print(f"Error initializing Daytona SDK: {e}")
         else:
             print("Warning: DAYTONA_API_KEY not set. Orchestrator will fail to create sandboxes.")
 
+    @property
+    def available(self):
+        """True if jobs can run, either on Daytona or locally."""
+        return self.executor is not None or bool(self.daytona)
+
+    def _start_background(self):
+        """Prepares the worker snapshot, then starts warming the pool, without blocking startup."""
+        def run():
+            self.ensure_snapshot()
+            self.pool.start()
+        self.reaper.start()
+        atexit.register(self.shutdown)
+        threading.Thread(target=run, name="worker-setup", daemon=True).start()
+
+    def creation_retry_after(self):
+        """
+        Seconds until work that needs a new sandbox can be accepted again: non-zero only
+        while the circuit breaker is open and the pool has no idle worker to hand out.
+        """
+        if self.executor:
+            return 0
+        retry_after = self.breaker.retry_after()
+        if retry_after and self.pool.stats()["idle"] == 0:
+            return retry_after
+        return 0
+
+    def shutdown(self, timeout=30):
+        """Deletes idle workers and waits for queued deletions, e.g. at interpreter exit."""
+        self.pool.close()
+        self.reaper.close(timeout)
+
+    def ensure_snapshot(self):
+        """
+        Makes sure the worker snapshot for the current manifest exists, building it once if needed.
+        Returns True if new sandboxes can be created from it.
+        """
+        if not self.snapshot_enabled or not self.daytona:
+            return False
+        with self._snapshot_lock:
+            if self.snapshot_ready:
+                return True
+            if time.time() - self._snapshot_checked_at < SNAPSHOT_RETRY_INTERVAL:
+                return False
+            self._snapshot_checked_at = time.time()
+
+            try:
+                snapshot = self.daytona.snapshot.get(self.snapshot_name)
+                state = str(getattr(snapshot, 'state', '')).lower()
+                if 'active' in state:
+                    print(f"Using worker snapshot {self.snapshot_name}.")
+                    self.snapshot_ready = True
+                    return True
+                print(f"Worker snapshot {self.snapshot_name} is not usable (state: {state}).")
+                return False
+            except Exception as e:
+                print(f"Worker snapshot {self.snapshot_name} not found: {e}")
+
+            print(f"Building worker snapshot {self.snapshot_name}...")
+            started = time.time()
+            try:
+                params = CreateSnapshotParams(name=self.snapshot_name, image=self.environment.build_image())
+                with self.metrics.timer("snapshot_build"):
+                    self.daytona.snapshot.create(params, on_logs=lambda line: print(f"[snapshot] {line}"))
+                print(f"Worker snapshot {self.snapshot_name} built in {time.time() - started:.1f}s.")
+                self.snapshot_ready = True
+                return True
+            except Exception as e:
+                print(f"Failed to build worker snapshot, falling back to installing dependencies on create: {e}")
+                return False
+
     def create_worker_sandbox(self):
-        """Creates a fresh, ephemeral sandbox."""
+        """Creates a fresh, ephemeral sandbox, from the worker snapshot when it is available."""
         if not self.daytona:
             raise Exception("Daytona SDK not initialized. Please set DAYTONA_API_KEY environment variable.")
         
+        self.breaker.before()
         print(f"Creating worker sandbox...")
+        started = time.time()
+        with self._live_lock:
+            self._creating += 1
         try:
-            # Create a standard python environment instead of cloning a repo
-            # This is faster and we upload scripts anyway
-            params = CreateSandboxBaseParams(language="python", ephemeral=True)
-            sandbox = self.daytona.create(params)
+            sandbox = None
+            mode = "install"
+            if self.snapshot_ready:
+                try:
+                    params = CreateSandboxFromSnapshotParams(snapshot=self.snapshot_name, language="python", ephemeral=True, labels=self.worker_labels)
+                    sandbox = self._create_sandbox(params, "snapshot")
+                    mode = "snapshot"
+                except Exception as e:
+                    # Snapshot deleted or broken: fall back and let the next ensure_snapshot() rebuild it
+                    print(f"Could not create sandbox from snapshot {self.snapshot_name}: {e}")
+                    self.snapshot_ready = False
+                    threading.Thread(target=self.ensure_snapshot, daemon=True).start()
+
+            if sandbox is None:
+                # Create a standard python environment instead of cloning a repo
+                # This is faster and we upload scripts anyway
+                params = CreateSandboxBaseParams(language="python", ephemeral=True, labels=self.worker_labels)
+                sandbox = self._create_sandbox(params, "install")
+            self.breaker.record_success()
+            with self._live_lock:
+                self._live_sandboxes.add(sandbox.id)
             print(f"Sandbox {sandbox.id} created.")
-            
-            # Setup dependencies
-            print("Setting up dependencies in worker...")
-            # We install all potential requirements
-            deps = "pdfminer.six python-docx weasyprint jinja2 pyyaml nltk"
-            # If we want ollama in the worker, we might need to install it too, 
-            # but usually ollama needs to be installed as a service (curl ... | sh).
-            # The 'ollama' python package is just a client.
-            # Let's install the client.
-            deps += " ollama"
-            
-            res = sandbox.process.exec(f"pip install {deps}")
-            if res.exit_code != 0:
-                print(f"Warning: Dependency installation might have failed: {res.result}")
-            
+
+            if mode == "install":
+                # Setup dependencies (declared in worker_requirements.txt)
+                print("Setting up dependencies in worker...")
+                with self.metrics.timer("install"):
+                    res = sandbox.process.exec(self.environment.install_command())
+                if res.exit_code != 0:
+                    self.metrics.inc("phase_failures_total", phase="install", error="exit_code")
+                    print(f"Warning: Dependency installation might have failed: {res.result}")
+
+            elapsed = time.time() - started
+            self.startup_times[mode].append(elapsed)
+            print(f"Sandbox {sandbox.id} ready in {elapsed:.1f}s ({mode}).")
             return sandbox
         except Exception as e:
             print(f"Failed to create sandbox: {e}")
+            if sandbox is not None:
+                # Created but not usable: don't leak it
+                self.cleanup_worker(sandbox)
+            else:
+                self.breaker.record_failure()
             raise
+        finally:
+            with self._live_lock:
+                self._creating -= 1
+
+    def _create_sandbox(self, params, mode):
+        """One (possibly hedged) daytona.create call. A hedged loser is deleted as soon as it exists."""
+        def attempt():
+            # Counted per attempt so the orphan sweep leaves a still-running hedge alone
+            with self._live_lock:
+                self._creating += 1
+            try:
+                return self.daytona.create(params)
+            finally:
+                with self._live_lock:
+                    self._creating -= 1
+
+        def discard(sandbox):
+            print(f"Deleting sandbox {sandbox.id}, it lost a hedged create.")
+            self.reaper.submit(sandbox)
+
+        with self.metrics.timer("create", mode=mode):
+            return self.hedger.run(mode, attempt, discard)
+
+    def startup_stats(self):
+        """Sandbox startup time per creation mode, to compare snapshot and install-on-create."""
+        stats = {}
+        for mode, times in self.startup_times.items():
+            ordered = sorted(times)
+            stats[mode] = {
+                "count": len(ordered),
+                "avg_s": round(sum(ordered) / len(ordered), 2) if ordered else None,
+                "p50_s": round(ordered[len(ordered) // 2], 2) if ordered else None,
+                "max_s": round(ordered[-1], 2) if ordered else None,
+            }
+        return stats
 
     def cleanup_worker(self, sandbox):
-        """Deletes the sandbox immediately."""
+        """Queues the sandbox for deletion by the background reaper and returns right away."""
+        print(f"Queueing sandbox {sandbox.id} for deletion...")
+        self.transfer.forget(sandbox)
+        with self._daemons_lock:
+            self._daemons.pop(sandbox.id, None)
+        with self._live_lock:
+            self._live_sandboxes.discard(sandbox.id)
+        self.reaper.submit(sandbox)
+
+    def _delete_sandbox(self, sandbox):
+        """Called by the reaper. Raises on failure so the deletion is retried."""
         # Ensure we use delete() as remove() is deprecated/not available in this SDK version
+        with self.metrics.timer("delete"):
+            self.daytona.delete(sandbox)
+        print(f"Sandbox {sandbox.id} deleted.")
+
+    def find_orphan_sandboxes(self):
+        """
+        Worker sandboxes that no running app process will delete: ours but no longer
+        in use, ones whose owner process on this host is gone, and any older than
+        `orphan_max_age` (owners on other hosts can't be checked directly).
+        """
+        if not self.daytona:
+            return []
+        now = time.time()
+        with self._live_lock:
+            live = set(self._live_sandboxes)
+            # A sandbox being created is listed before create() returns its id
+            creating = self._creating > 0
+        orphans = []
+        for sandbox in self.daytona.list(ListSandboxesQuery(labels={"app": WORKER_LABEL})):
+            labels = getattr(sandbox, 'labels', None) or {}
+            if labels.get("app") != WORKER_LABEL:
+                continue
+            if labels.get("owner_token") == INSTANCE_TOKEN:
+                if sandbox.id not in live and not creating:
+                    orphans.append(sandbox)
+                continue
+            if labels.get("owner_host") == self.worker_labels["owner_host"] and not self._pid_alive(labels.get("owner_pid")):
+                orphans.append(sandbox)
+                continue
+            created = self._created_at(sandbox)
+            if created is not None and now - created > self.orphan_max_age:
+                orphans.append(sandbox)
+        return orphans
+
+    def _pid_alive(self, pid):
         try:
-            print(f"Deleting sandbox {sandbox.id}...")
-            self.daytona.delete(sandbox.id)
-            print(f"Sandbox {sandbox.id} deleted.")
-        except Exception as e:
-            print(f"Error cleaning up sandbox: {e}")
+            os.kill(int(pid), 0)
+        except (TypeError, ValueError, ProcessLookupError):
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _created_at(self, sandbox):
+        """Creation time of a sandbox as a timestamp, or None if unknown."""
+        value = getattr(sandbox, 'created_at', None)
+        if not value:
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            from datetime import datetime
+            return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+
+    def check_worker(self, sandbox):
+        """Returns True if the sandbox still answers commands."""
+        with self.metrics.timer("health_check"):
+            res = sandbox.process.exec("echo ok")
+        return res.exit_code == 0
 
-    def parse_resume(self, file_path, file_content):
+    @contextmanager
+    def worker_session(self):
         """
-        1. Create Worker
-        2. Upload file & script
-        3. Run extraction
-        4. Cleanup
+        Leases a warm worker from the pool and gives the job its own working directory.
+        The directory is wiped before the worker goes back to the pool, so no user
+        files outlive the job. If the wipe fails, the worker is destroyed instead.
         """
-        print(f"Starting Parse Resume for {file_path}...")
-        sandbox = None
+        with self.metrics.timer("lease"):
+            sandbox = self.pool.lease()
+        workdir = f"job-{uuid.uuid4().hex[:12]}"
+        healthy = False
         try:
-            sandbox = self.create_worker_sandbox()
-            
-            # Upload script
-            print("Uploading scripts...")
-            with open('worker_extractor.py', 'r') as f:
-                script_content = f.read()
-            self.upload_file(sandbox, 'worker_extractor.py', script_content)
-            
-            # Upload Resume Extractor Lib
-            with open('resume_extractor.py', 'r') as f:
-                lib_content = f.read()
-            self.upload_file(sandbox, 'resume_extractor.py', lib_content)
-
-            # Upload Target File
-            filename = os.path.basename(file_path)
-            print(f"Uploading resume file: {filename}")
-            self.upload_file(sandbox, filename, file_content)
-
-            # Run
-            cmd = f"python worker_extractor.py '{filename}'"
-            print(f"Running command in sandbox: {cmd}")
-            response = sandbox.process.exec(cmd)
-            
+            with self.metrics.timer("workdir_setup"):
+                res = sandbox.process.exec(f"mkdir -p {workdir}")
+            if res.exit_code != 0:
+                raise Exception(f"Failed to create job directory: {res.result}")
+            healthy = True
+            yield sandbox, workdir
+        finally:
+            if healthy:
+                try:
+                    with self.metrics.timer("workdir_wipe"):
+                        res = sandbox.process.exec(f"rm -rf {workdir}")
+                    healthy = res.exit_code == 0
+                except Exception as e:
+                    print(f"Error wiping job directory on sandbox {sandbox.id}: {e}")
+                    healthy = False
+            self.pool.release(sandbox, healthy=healthy)
+
+    def pool_stats(self):
+        if self.executor:
+            stats = self.executor.stats()
+        else:
+            stats = self._sandbox_stats()
+        if self.render_cache is not None:
+            stats["render_cache"] = self.render_cache.stats()
+        if self.extraction_cache is not None:
+            stats["extraction_cache"] = self.extraction_cache.stats()
+        stats["phases"] = self.metrics.summary("phase_duration_seconds")
+        return stats
+
+    def _sandbox_stats(self):
+        stats = self.pool.stats()
+        stats["snapshot"] = {
+            "name": self.snapshot_name,
+            "enabled": self.snapshot_enabled,
+            "ready": self.snapshot_ready,
+        }
+        stats["startup"] = self.startup_stats()
+        stats["reaper"] = self.reaper.stats()
+        stats["breaker"] = self.breaker.stats()
+        stats["hedge"] = self.hedger.stats()
+        return stats
+
+    def metrics_text(self):
+        """Prometheus text for /api/metrics: phase histograms plus current pool and transfer state."""
+        stats = self.pool_stats()
+        for key, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.metrics.set_gauge(f"{'executor' if self.executor else 'pool'}_{key}", value)
+        for key, value in self.transfer.stats.items():
+            self.metrics.set_gauge(f"transfer_{key}", value)
+        for key, value in self.reaper.stats().items():
+            self.metrics.set_gauge(f"reaper_{key}", value)
+        if self.render_cache is not None:
+            for key, value in self.render_cache.stats().items():
+                if value is not None:
+                    self.metrics.set_gauge(f"render_cache_{key}", value)
+        if self.extraction_cache is not None:
+            for key, value in self.extraction_cache.stats().items():
+                if value is not None:
+                    self.metrics.set_gauge(f"extraction_cache_{key}", value)
+        return self.metrics.render()
+
+    def ensure_daemon(self, sandbox):
+        """
+        Makes sure the resident worker daemon runs the current code on the sandbox.
+        Returns False if it could not be started, in which case jobs fall back to one-off scripts.
+        """
+        files = self._app_files(*DAEMON_FILES)
+        version = hashlib.sha256(b"".join(files[p] for p in DAEMON_FILES)).hexdigest()[:12]
+        with self._daemons_lock:
+            state = self._daemons.get(sandbox.id)
+        if state == version:
+            return True
+        if state == ("failed", version):
+            # Already failed with this code on this sandbox, don't wait for it again
+            return False
+
+        started = time.time()
+        try:
+            print(f"Starting worker daemon {version} on {sandbox.id}...")
+            self.upload_files(sandbox, files, base=DAEMON_DIR, cacheable=DAEMON_FILES)
+            # Separate execs, or pkill would match the shell that starts the new daemon
+            sandbox.process.exec("pkill -f '[w]orker_daemon.py serve'")
+            sandbox.process.exec(
+                f"nohup python {DAEMON_DIR}/worker_daemon.py serve --socket {DAEMON_SOCKET} --version {version} "
+                f"> /tmp/rb-worker.log 2>&1 < /dev/null &"
+            )
+            deadline = time.time() + DAEMON_START_TIMEOUT
+            while time.time() < deadline:
+                try:
+                    info = self._daemon_call(sandbox, "ping", {})
+                    if info.get("version") == version:
+                        with self._daemons_lock:
+                            self._daemons[sandbox.id] = version
+                        self.metrics.observe("phase_duration_seconds", time.time() - started, phase="daemon_start", status="ok")
+                        print(f"Worker daemon ready on {sandbox.id}.")
+                        return True
+                except DaemonUnavailableError:
+                    pass
+                time.sleep(0.5)
+            log = sandbox.process.exec("tail -n 20 /tmp/rb-worker.log")
+            print(f"Worker daemon did not start on {sandbox.id}:\n{log.result}")
+        except Exception as e:
+            print(f"Failed to start worker daemon on {sandbox.id}: {e}")
+        self.metrics.inc("phase_failures_total", phase="daemon_start", error="not_ready")
+        with self._daemons_lock:
+            self._daemons[sandbox.id] = ("failed", version)
+        return False
+
+    def _daemon_call(self, sandbox, op, args):
+        """Sends one request to the sandbox's worker daemon and returns the result."""
+        request = {"id": uuid.uuid4().hex[:8], "op": op, "args": args}
+        request_b64 = base64.b64encode(json.dumps(request).encode('utf-8')).decode('ascii')
+        res = sandbox.process.exec(f"python {DAEMON_DIR}/worker_daemon.py call --socket {DAEMON_SOCKET} --request {request_b64}")
+        try:
+            response = json.loads(res.result.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            response = {"error": res.result}
+        if res.exit_code == EXIT_UNAVAILABLE or (res.exit_code != 0 and "ok" not in response):
+            with self._daemons_lock:
+                self._daemons.pop(sandbox.id, None)
+            raise DaemonUnavailableError(response.get("error"))
+        if not response.get("ok"):
+            raise Exception(response.get("error"))
+        return response["result"]
+
+    def _run_worker_op(self, sandbox, workdir, op, args, script_files, cmd):
+        """
+        Runs one job step on the resident daemon, or as a one-off script in `workdir`
+        when the daemon is disabled or unavailable. Returns the daemon result or the script output.
+        """
+        if self.use_daemon and self.ensure_daemon(sandbox):
+            try:
+                with self.metrics.timer("exec", op=op, via="daemon"):
+                    return self._daemon_call(sandbox, op, dict(args, cwd=workdir))
+            except DaemonUnavailableError as e:
+                print(f"Worker daemon unavailable on {sandbox.id}, running script instead: {e}")
+        return self._run_script_op(sandbox, workdir, script_files, cmd, op)
+
+    def _run_script_op(self, sandbox, workdir, script_files, cmd, op):
+        """Uploads the scripts to `workdir` and runs `cmd` there. Returns its output."""
+        self.upload_files(sandbox, self._app_files(*script_files), base=workdir, cacheable=APP_FILES)
+        print(f"Running command in sandbox: {cmd}")
+        with self.metrics.timer("exec", op=op, via="script"):
+            response = sandbox.process.exec(f"cd {workdir} && {cmd}")
             print(f"Worker Output:\n{response.result}")
-            
             if response.exit_code != 0:
-                raise Exception(f"Extraction failed: {response.result}")
-            
-            return response.result
+                raise WorkerCommandError(response.result)
+        return response.result
+
+    def _report(self, progress, stage):
+        if progress:
+            progress(stage)
+
+    def cached_extraction(self, digest, file_path):
+        """Text extracted earlier from an upload with the same SHA-256 and file type, or None."""
+        if self.extraction_cache is None:
+            return None
+        return self.extraction_cache.fetch(_upload_key(digest, file_path))
+
+    def parse_resume(self, file_path, file_content, progress=None, digest=None, check_cache=True):
+        """
+        Extracts the text of an uploaded resume, reusing the result of an identical earlier upload.
+        `digest` is the SHA-256 hex digest of file_content if the caller already has it. Pass
+        check_cache=False if the caller already tried cached_extraction(); the result is still stored.
+        """
+        if self.extraction_cache is not None and digest is None:
+            digest = hashlib.sha256(file_content).hexdigest()
+        if check_cache:
+            text = self.cached_extraction(digest, file_path)
+            if text is not None:
+                print("Resume text served from extraction cache.")
+                return text
+        # A failed extraction raises (non-zero exit, daemon error or ExtractionError), so it is never stored
+        text = self._parse_resume(file_path, file_content, progress=progress)
+        if self.extraction_cache is not None:
+            self.extraction_cache.store(_upload_key(digest, file_path), text)
+        return text
+
+    @timed_job("extract")
+    def _parse_resume(self, file_path, file_content, progress=None):
+        """
+        1. Lease Worker
+        2. Upload file
+        3. Run extraction (resident daemon or script)
+        4. Return worker to pool
+        """
+        print(f"Starting Parse Resume for {file_path}...")
+        if self.executor:
+            self._report(progress, "extracting")
+            return self.executor.parse_resume(file_path, file_content)
+        try:
+            with self.worker_session() as (sandbox, workdir):
+                self._report(progress, "sandbox_created")
+                # Upload the resume file
+                filename = os.path.basename(file_path)
+                print(f"Uploading resume file: {filename}")
+                self.upload_files(sandbox, {filename: file_content}, base=workdir)
+                self._report(progress, "uploaded")
+
+                # Run on the resident daemon, or as a script
+                self._report(progress, "extracting")
+                try:
+                    return self._run_worker_op(
+                        sandbox, workdir, "extract", {"path": filename},
+                        EXTRACT_FILES,
+                        # Output is the resume text: keep diagnostics out of it unless the script fails
+                        f"python worker_extractor.py '{filename}' 2> extract.log || {{ cat extract.log; exit 1; }}",
+                    )
+                except Exception as e:
+                    raise Exception(f"Extraction failed: {e}")
 
         except Exception as e:
             print(f"Error in parse_resume: {e}")
             raise
-        finally:
-            if sandbox:
-                self.cleanup_worker(sandbox)
 
-    def generate_pdf(self, resume_data):
+    def cached_pdf(self, resume_data, output_path, style=None):
+        """Links an identical earlier render to output_path. Returns False if there is none."""
+        if self.render_cache is None:
+            return False
+        return self.render_cache.fetch(self.render_cache.key(resume_data, style), output_path)
+
+    def generate_pdf(self, resume_data, output_path, style=None, progress=None, check_cache=True):
+        """
+        Renders resume_data to output_path, reusing an identical earlier render when there is one.
+        Pass check_cache=False if the caller already tried cached_pdf(); the result is still stored.
+        """
+        if check_cache and self.cached_pdf(resume_data, output_path, style):
+            print("PDF served from render cache.")
+            return output_path
+        self._render_pdf(resume_data, output_path, style=style, progress=progress)
+        if self.render_cache is not None:
+            self.render_cache.store(self.render_cache.key(resume_data, style), output_path)
+        return output_path
+
+    @timed_job("render")
+    def _render_pdf(self, resume_data, output_path, style=None, progress=None):
         """
-        1. Create Worker
-        2. Upload data & scripts
-        3. Generate PDF
-        4. Download PDF
-        5. Cleanup
+        1. Lease Worker
+        2. Upload data
+        3. Generate PDF (resident daemon or script)
+        4. Stream PDF to output_path
+        5. Return worker to pool
         """
         print("Starting PDF Generation...")
-        sandbox = None
+        if self.executor:
+            self._report(progress, "rendering")
+            return self.executor.generate_pdf(resume_data, output_path, style)
         try:
-            sandbox = self.create_worker_sandbox()
-            
-            # Upload scripts and templates
-            print("Uploading scripts and templates...")
-            self.upload_file(sandbox, 'generate_resume.py', open('generate_resume.py').read())
-            
-            sandbox.process.exec("mkdir -p templates")
-            self.upload_file(sandbox, 'templates/resume.html', open('templates/resume.html').read())
-            
-            # Upload Data
-            import yaml
-            yaml_str = yaml.dump(resume_data)
-            self.upload_file(sandbox, 'resume.yaml', yaml_str)
-
-            # Debug: List files and check CWD
-            print("Debugging sandbox state...")
-            debug_res = sandbox.process.exec("pwd && ls -la && ls -la templates")
-            print(f"Sandbox State:\n{debug_res.result}")
-
-            # Run
-            cmd = "python generate_resume.py --data resume.yaml"
-            print(f"Running command: {cmd}")
-            response = sandbox.process.exec(cmd)
-            print(f"Worker Output:\n{response.result}")
-            
-            if response.exit_code != 0:
-                raise Exception(f"Generation failed: {response.result}")
-            
-            # Find the PDF file
-            ls_res = sandbox.process.exec("ls *.pdf")
-            pdf_filename = ls_res.result.strip().split('\n')[0]
-            if not pdf_filename:
-                 raise Exception("No PDF file found in worker output")
-            
-            # Download
-            print(f"Downloading {pdf_filename}...")
-            cat_res = sandbox.process.exec(f"base64 {pdf_filename}")
-            if cat_res.exit_code != 0:
-                raise Exception("Failed to read PDF file")
-            
-            import base64
-            # Clean up output (remove newlines/spaces if any)
-            b64_content = cat_res.result.strip().replace('\n', '').replace('\r', '')
-            pdf_content = base64.b64decode(b64_content)
-            return pdf_content
+            with self.worker_session() as (sandbox, workdir):
+                self._report(progress, "sandbox_created")
+                # Upload data
+                print("Uploading data...")
+                import yaml
+                files = {'resume.yaml': yaml.dump(resume_data), 'style.json': json.dumps(style or {})}
+                self.upload_files(sandbox, files, base=workdir)
+                self._report(progress, "uploaded")
+
+                # Debug: List files and check CWD
+                print("Debugging sandbox state...")
+                with self.metrics.timer("debug_ls"):
+                    debug_res = sandbox.process.exec(f"cd {workdir} && pwd && ls -la")
+                print(f"Sandbox State:\n{debug_res.result}")
+
+                # Run on the resident daemon, or as a script
+                self._report(progress, "rendering")
+                try:
+                    self._run_worker_op(
+                        sandbox, workdir, "render",
+                        {"data_path": "resume.yaml", "style_path": "style.json", "output": "resume.pdf"},
+                        RENDER_FILES,
+                        "python generate_resume.py --data resume.yaml --style style.json --output resume.pdf",
+                    )
+                except Exception as e:
+                    raise Exception(f"Generation failed: {e}")
+
+                # Find the PDF file and stream it straight to disk
+                with self.metrics.timer("list_artifacts"):
+                    artifacts = self.transfer.list_artifacts(sandbox, ['*.pdf'], base=workdir)
+                if not artifacts:
+                     raise Exception("No PDF file found in worker output")
+
+                self._report(progress, "downloading")
+                print(f"Downloading {artifacts[0]['path']}...")
+                with self.metrics.timer("download"):
+                    self.transfer.download(sandbox, artifacts[:1], [output_path])
+                return output_path
 
         except Exception as e:
             print(f"Error in generate_pdf: {e}")
             raise
-        finally:
-            if sandbox:
-                self.cleanup_worker(sandbox)
 
-    def analyze_ats(self, resume_text, job_desc_text):
+    def generate_pdfs(self, variants, output_paths, progress=None):
         """
-        1. Create Worker
-        2. Upload scripts & data
-        3. Run ATS analysis
-        4. Cleanup
+        Renders several (resume_data, style) variants in one worker session.
+
+        All variants are uploaded together and rendered in parallel by the worker
+        daemon (one after another when running scripts). Returns one entry per variant,
+        {"path": output_path} or {"error": message}, so one bad variant doesn't fail the rest.
+        Variants found in the render cache are linked and never sent to the worker.
+        """
+        outcome = [None] * len(variants)
+        misses = []
+        for i, ((resume_data, style), output_path) in enumerate(zip(variants, output_paths)):
+            if self.cached_pdf(resume_data, output_path, style):
+                outcome[i] = {"path": output_path}
+            else:
+                misses.append(i)
+        if misses:
+            results = self._render_pdfs([variants[i] for i in misses], [output_paths[i] for i in misses], progress=progress)
+            for i, result in zip(misses, results):
+                outcome[i] = result
+                if self.render_cache is not None and "path" in result:
+                    self.render_cache.store(self.render_cache.key(*variants[i]), result["path"])
+        return outcome
+
+    @timed_job("render_batch")
+    def _render_pdfs(self, variants, output_paths, progress=None):
+        print(f"Starting batch PDF Generation ({len(variants)} variants)...")
+        if self.executor:
+            self._report(progress, "rendering")
+            return self._generate_pdfs_local(variants, output_paths)
+        try:
+            with self.worker_session() as (sandbox, workdir):
+                self._report(progress, "sandbox_created")
+                import yaml
+                files = {}
+                items = []
+                for i, (resume_data, style) in enumerate(variants):
+                    files[f'v{i}.yaml'] = yaml.dump(resume_data)
+                    files[f'v{i}.style.json'] = json.dumps(style or {})
+                    items.append({"data_path": f'v{i}.yaml', "style_path": f'v{i}.style.json', "output": f'v{i}.pdf'})
+                self.upload_files(sandbox, files, base=workdir)
+                self._report(progress, "uploaded")
+
+                self._report(progress, "rendering")
+                results = None
+                if self.use_daemon and self.ensure_daemon(sandbox):
+                    try:
+                        with self.metrics.timer("exec", op="render_batch", via="daemon"):
+                            results = self._daemon_call(sandbox, "render_batch", {"items": items, "cwd": workdir})
+                    except DaemonUnavailableError as e:
+                        print(f"Worker daemon unavailable on {sandbox.id}, running scripts instead: {e}")
+                if results is None:
+                    results = []
+                    for item in items:
+                        cmd = f"python generate_resume.py --data {item['data_path']} --style {item['style_path']} --output {item['output']}"
+                        try:
+                            self._run_script_op(sandbox, workdir, RENDER_FILES, cmd, "render")
+                            results.append({"output": item["output"]})
+                        except Exception as e:
+                            results.append({"error": f"Generation failed: {e}"})
+
+                # Stream every rendered PDF straight to its destination
+                self._report(progress, "downloading")
+                with self.metrics.timer("list_artifacts"):
+                    listed = self.transfer.list_artifacts(sandbox, ['v*.pdf'], base=workdir)
+                artifacts = {os.path.basename(a["path"]): a for a in listed}
+                outcome = []
+                for item, result, output_path in zip(items, results, output_paths):
+                    artifact = artifacts.get(item["output"])
+                    if "error" in result:
+                        outcome.append({"error": result["error"]})
+                    elif artifact is None:
+                        outcome.append({"error": "No PDF file found in worker output"})
+                    else:
+                        try:
+                            with self.metrics.timer("download"):
+                                self.transfer.download(sandbox, [artifact], [output_path])
+                            outcome.append({"path": output_path})
+                        except Exception as e:
+                            outcome.append({"error": str(e)})
+                return outcome
+
+        except Exception as e:
+            print(f"Error in generate_pdfs: {e}")
+            raise
+
+    def _generate_pdfs_local(self, variants, output_paths):
+        def render(variant, output_path):
+            try:
+                return {"path": self.executor.generate_pdf(variant[0], output_path, variant[1])}
+            except Exception as e:
+                return {"error": str(e)}
+
+        # No more threads than pool processes, so the batch never overflows the executor queue
+        with ThreadPoolExecutor(max_workers=min(len(variants), self.executor.max_workers) or 1) as threads:
+            return list(threads.map(render, variants, output_paths))
+
+    @timed_job("analyze")
+    def analyze_ats(self, resume_text, job_desc_text, use_llm=False):
+        """
+        1. Lease Worker
+        2. Upload data
+        3. Run ATS analysis (resident daemon or script), with Ollama feedback if use_llm
+        4. Return worker to pool
+
+        Plain keyword scoring doesn't need a worker, see ats_engine.py.
         """
         print("Starting ATS Analysis...")
-        sandbox = None
+        if self.executor:
+            return self.executor.analyze_ats(resume_text, job_desc_text, use_llm)
         try:
-            sandbox = self.create_worker_sandbox()
-            
-            # Upload scripts
-            print("Uploading scripts...")
-            self.upload_file(sandbox, 'ats_analyzer.py', open('ats_analyzer.py').read())
-            
-            # Upload Data
-            self.upload_file(sandbox, 'resume.txt', resume_text)
-            self.upload_file(sandbox, 'job_desc.txt', job_desc_text)
-            
-            # Run
-            # Install Ollama if we want to use it? 
-            # The base setup doesn't have ollama server running.
-            # We can try to install it.
-            print("Checking/Installing Ollama in worker...")
-            # This might be slow.
-            sandbox.process.exec("curl -fsSL https://ollama.com/install.sh | sh")
-            # Start ollama in background?
-            # sandbox.process.exec("ollama serve &")
-            # This is complex in a transient sandbox. 
-            # For now, let's assume we use the python logic first.
-            
-            cmd = "python ats_analyzer.py resume.txt job_desc.txt" # --ollama omitted for speed/reliability unless requested
-            # If user wants ollama, we need a persistent worker or pre-built image.
-            
-            print(f"Running command: {cmd}")
-            response = sandbox.process.exec(cmd)
-            print(f"Worker Output:\n{response.result}")
-            
-            if response.exit_code != 0:
-                raise Exception(f"ATS Analysis failed: {response.result}")
-            
-            return json.loads(response.result)
+            with self.worker_session() as (sandbox, workdir):
+                # Upload data
+                print("Uploading data...")
+                files = {'resume.txt': resume_text, 'job_desc.txt': job_desc_text}
+                self.upload_files(sandbox, files, base=workdir)
+
+                if use_llm:
+                    # Only the LLM tier needs Ollama. Pooled workers keep it installed and serving between jobs.
+                    print("Checking/Installing Ollama in worker...")
+                    with self.metrics.timer("ollama_install"):
+                        sandbox.process.exec("command -v ollama || curl -fsSL https://ollama.com/install.sh | sh")
+                        sandbox.process.exec("pgrep -x ollama || nohup ollama serve > /tmp/ollama.log 2>&1 < /dev/null &")
+
+                try:
+                    result = self._run_worker_op(
+                        sandbox, workdir, "analyze",
+                        {"resume_path": "resume.txt", "job_desc_path": "job_desc.txt", "ollama": use_llm},
+                        ('ats_analyzer.py',),
+                        "python ats_analyzer.py resume.txt job_desc.txt" + (" --ollama" if use_llm else ""),
+                    )
+                except Exception as e:
+                    raise Exception(f"ATS Analysis failed: {e}")
+
+                # The script prints JSON, the daemon returns it already decoded
+                return json.loads(result) if isinstance(result, str) else result
 
         except Exception as e:
             print(f"Error in analyze_ats: {e}")
             raise
-        finally:
-            if sandbox:
-                self.cleanup_worker(sandbox)
 
-    def upload_file(self, sandbox, path, content):
-        """Helper to upload file content to sandbox using a robust base64-exec pattern."""
-        import base64
-        
-        # Prepare content and mode
-        if isinstance(content, str):
-            content_bytes = content.encode('utf-8')
-            mode = 'w'
-        else:
-            content_bytes = content
-            mode = 'wb'
+    def _app_files(self, *paths):
+        """Reads application files that get shipped to workers."""
+        files = {}
+        for path in paths:
+            with open(path, 'rb') as f:
+                files[path] = f.read()
+        return files
 
-        b64_content = base64.b64encode(content_bytes).decode('utf-8')
-        
-        # Python script to be executed in the sandbox
-        # We handle directory creation and file writing
-        remote_script = f"""
-import base64
-import os
-
-path = '{path}'
-dir_name = os.path.dirname(path)
-if dir_name:
-    os.makedirs(dir_name, exist_ok=True)
-
-content = base64.b64decode('{b64_content}')
-mode = '{mode}'
-
-with open(path, mode) as f:
-    if mode == 'w':
-        f.write(content.decode('utf-8'))
-    else:
-        f.write(content)
-"""
-        # Encode the script itself to avoid shell escaping issues
-        remote_script_b64 = base64.b64encode(remote_script.encode('utf-8')).decode('utf-8')
-        
-        # Execute the script
-        cmd = f"python -c \"import base64; exec(base64.b64decode('{remote_script_b64}').decode('utf-8'))\""
-        
-        print(f"Uploading {path}...")
-        res = sandbox.process.exec(cmd)
-        if res.exit_code != 0:
-            raise Exception(f"Failed to upload {path}: {res.result}")
+    def upload_files(self, sandbox, files, base='.', cacheable=()):
+        """
+        Uploads several files in one compressed archive and unpacks them with a single exec.
+        Files in `cacheable` that the worker already has (same content hash) are not re-sent.
+        """
+        with self.metrics.timer("upload"):
+            self.transfer.upload(sandbox, files, base=base, cacheable=cacheable)
 
+    def upload_file(self, sandbox, path, content):
+        """Helper to upload a single file's content to the sandbox."""
+        self.upload_files(sandbox, {path: content})
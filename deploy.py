@@ -11,7 +11,9 @@ def deploy(workspace_fqn):
         name="resume-builder",
         image=Image(
             build_source=PythonBuild(
-                command="gunicorn app:app --bind 0.0.0.0:8000",
+                # One process (job queue, admission and caches live in it) with threads: each open
+                # job event stream holds a thread, so a sync worker would block everyone else
+                command="gunicorn app:app --bind 0.0.0.0:8000 --workers 1 --worker-class gthread --threads 32",
                 requirements_path="requirements.txt",
                 python_version="3.11"
             )
@@ -38,7 +40,8 @@ def deploy(workspace_fqn):
         },
         # Secrets like DAYTONA_API_KEY should be set in the TrueFoundry UI or passed securely
         # secrets={
-        #     "DAYTONA_API_KEY": "tfy-secret://your-secret-group/daytona-api-key"
+        #     "DAYTONA_API_KEY": "tfy-secret://your-secret-group/daytona-api-key",
+        #     "OPS_TOKEN": "tfy-secret://your-secret-group/ops-token"  # /api/pool_stats and /api/metrics
         # }
     )
 
@@ -0,0 +1,125 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+def approx_size(value, _seen=None):
+    """Rough deep size in bytes of parsed data: dicts, lists, strings and __slots__ objects."""
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += approx_size(key, _seen) + approx_size(item, _seen)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approx_size(item, _seen)
+    elif not isinstance(value, (str, bytes, int, float)):
+        for cls in type(value).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                size += approx_size(getattr(value, slot, None), _seen)
+    return size
+
+
+class _Entry:
+    __slots__ = ('stamp', 'value', 'derived', 'size')
+
+    def __init__(self, stamp, value, size):
+        self.stamp = stamp
+        self.value = value
+        self.derived = {}
+        self.size = size
+
+
+class DocumentCache:
+    """
+    Parsed files, kept per process while the file is unchanged.
+
+    `load(path, parse)` returns `parse(raw bytes)` for the file and caches it
+    under (path, parse), valid while the file's (mtime, size) stays the same.
+    `derive(path, parse, name, func)` caches `func(value)` alongside it, e.g. the
+    editor text of a resume. Least recently used entries are dropped once their
+    approximate size passes `max_bytes`. Cached values are shared between
+    requests: treat them as read-only.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def load(self, path, parse):
+        return self._entry(path, parse).value
+
+    def derive(self, path, parse, name, func):
+        entry = self._entry(path, parse)
+        with self._lock:
+            if name in entry.derived:
+                return entry.derived[name]
+        value = func(entry.value)
+        size = approx_size(value)
+        with self._lock:
+            entry.derived[name] = value
+            # Only charged while the entry is still cached
+            if self._entries.get((path, parse)) is entry:
+                entry.size += size
+                self._bytes += size
+                self._evict()
+        return value
+
+    def invalidate(self, path):
+        """Drops everything cached for path, e.g. right after writing it."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._forget(key)
+
+    def stats(self):
+        with self._lock:
+            stats = {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+            stats.update(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+    def _entry(self, path, parse):
+        key = (path, parse)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry
+            self._counters["misses"] += 1
+
+        # Stat taken before reading: a write during the read leaves a stale stamp, so the next call re-reads
+        with open(path, 'rb') as f:
+            value = parse(f.read())
+        entry = _Entry(stamp, value, approx_size(value))
+        if self.max_bytes <= 0:
+            return entry
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+        return entry
+
+    def _forget(self, key):
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self):
+        # Caller holds the lock
+        while self._bytes > self.max_bytes and self._entries:
+            self._forget(next(iter(self._entries)))
+            self._counters["evictions"] += 1
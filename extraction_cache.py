@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class ExtractionCache:
+    """
+    Persistent cache of text extracted from uploaded resumes, in SQLite.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes (plus the file type)
+    and the extractor version, so a change to the extraction code is a miss.
+    Rows of other versions are dropped at startup. Entries unused for `max_age`
+    seconds expire, and the least recently used ones are evicted past
+    `max_entries`. Like the render cache it is optional: errors are logged and
+    counted, never raised.
+    """
+
+    def __init__(self, db_path, extractor_version='', max_entries=1000, max_age=30 * 86400):
+        self.db_path = db_path
+        self.extractor_version = extractor_version
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            c = conn.cursor()
+            c.execute('''CREATE TABLE IF NOT EXISTS extractions
+                         (digest TEXT NOT NULL,
+                          extractor_version TEXT NOT NULL,
+                          text TEXT NOT NULL,
+                          size INTEGER NOT NULL,
+                          created_at REAL NOT NULL,
+                          last_used REAL NOT NULL,
+                          hits INTEGER NOT NULL DEFAULT 0,
+                          PRIMARY KEY (digest, extractor_version))''')
+            c.execute("CREATE INDEX IF NOT EXISTS extractions_last_used ON extractions (last_used)")
+            # Text from an older extractor is never read again
+            c.execute("DELETE FROM extractions WHERE extractor_version != ?", (self.extractor_version,))
+            self._count("evictions", c.rowcount)
+            self._evict(c)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def fetch(self, digest):
+        """The cached text for an upload, or None on a miss."""
+        try:
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                c.execute("SELECT text, last_used FROM extractions WHERE digest = ? AND extractor_version = ?",
+                          (digest, self.extractor_version))
+                row = c.fetchone()
+                now = time.time()
+                if row and self.max_age and row[1] < now - self.max_age:
+                    row = None
+                if row:
+                    c.execute("UPDATE extractions SET last_used = ?, hits = hits + 1 WHERE digest = ? AND extractor_version = ?",
+                              (now, digest, self.extractor_version))
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Extraction cache lookup failed: {e}")
+            self._count("errors")
+            return None
+        self._count("hits" if row else "misses")
+        return row[0] if row else None
+
+    def store(self, digest, text):
+        try:
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                now = time.time()
+                c.execute("INSERT OR REPLACE INTO extractions (digest, extractor_version, text, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                          (digest, self.extractor_version, text, len(text.encode('utf-8')), now, now))
+                self._evict(c)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Could not store extraction in cache: {e}")
+            self._count("errors")
+            return
+        self._count("stores")
+
+    def stats(self):
+        stats = {"entries": None, "bytes": None, "max_entries": self.max_entries, "max_age": self.max_age}
+        try:
+            conn = self._connect()
+            try:
+                c = conn.cursor()
+                c.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions WHERE extractor_version = ?",
+                          (self.extractor_version,))
+                stats["entries"], stats["bytes"] = c.fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Could not read extraction cache stats: {e}")
+        with self._lock:
+            stats.update(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _evict(self, c):
+        # Expired entries first, then the least recently used ones past max_entries
+        evicted = 0
+        if self.max_age:
+            c.execute("DELETE FROM extractions WHERE last_used < ?", (time.time() - self.max_age,))
+            evicted += c.rowcount
+        c.execute("DELETE FROM extractions WHERE rowid IN (SELECT rowid FROM extractions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                  (self.max_entries,))
+        evicted += c.rowcount
+        if evicted:
+            self._count("evictions", evicted)
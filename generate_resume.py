@@ -1,31 +1,303 @@
 import yaml
+import json
 import argparse
-from jinja2 import Environment, FileSystemLoader
+import socket
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from weasyprint import HTML
+from weasyprint.text.fonts import FontConfiguration
 from datetime import datetime
 import os
 import sys
+from template_registry import DEFAULT_TEMPLATE, get_registry
 
 def load_data(yaml_path):
     with open(yaml_path, 'r') as file:
         return yaml.safe_load(file)
 
-def generate_pdf(data, output_filename, template_dir='templates', template_name='resume.html', style=None):
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template(template_name)
-    
-    html_content = template.render(resume=data, style=style or {})
-    
-    # Generate PDF
-    HTML(string=html_content).write_pdf(output_filename)
+class Renderer:
+    """
+    Keeps the compiled templates (see template_registry.py) and the WeasyPrint
+    font configuration alive between renders.
+    """
+
+    def __init__(self, template_dir='templates'):
+        self.template_dir = template_dir
+        self.templates = get_registry(template_dir)
+        self.font_config = FontConfiguration()
+        self.renders = 0
+
+    def warm_up(self, template_name=DEFAULT_TEMPLATE):
+        """Compiles the template and lays out a tiny document so fonts are loaded before the first request."""
+        self.templates.get(template_name)
+        HTML(string="<p>warm up</p>").write_pdf(font_config=self.font_config)
+
+    def render(self, data, output_filename, template_name=DEFAULT_TEMPLATE, style=None):
+        """Writes the PDF and returns its page count."""
+        html_content = self.templates.render(template_name, resume=data, style=style or {})
+        document = HTML(string=html_content).render(font_config=self.font_config)
+        document.write_pdf(output_filename)
+        self.renders += 1
+        return len(document.pages)
+
+_renderers = {}
+
+def get_renderer(template_dir='templates'):
+    renderer = _renderers.get(template_dir)
+    if renderer is None:
+        renderer = _renderers[template_dir] = Renderer(template_dir)
+    return renderer
+
+def generate_pdf(data, output_filename, template_dir='templates', template_name=DEFAULT_TEMPLATE, style=None):
+    # Reused within a process, e.g. by the worker daemon and the render server
+    get_renderer(template_dir).render(data, output_filename, template_name=template_name, style=style)
     print(f"Resume generated: {output_filename}")
 
+# Environment variable that passes the listening socket to the re-executed render server
+LISTEN_FD_ENV = 'RENDER_SERVER_LISTEN_FD'
+# Seconds a connection may stay idle once the server is due to recycle
+RECYCLE_GRACE = 5
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current RSS, but still bounded
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def handle_request(renderer, request):
+    """
+    Renders one server request:
+    {"id": ..., "data" | "data_path": ..., "style" | "style_path": ..., "output": "out.pdf", "template": "resume"}
+    """
+    request_id = request.get("id")
+    try:
+        data = request.get("data")
+        if data is None:
+            data = load_data(request["data_path"])
+        style = request.get("style")
+        if style is None and request.get("style_path"):
+            with open(request["style_path"], 'r') as f:
+                style = json.load(f)
+        renderer.render(data, request["output"], template_name=request.get("template", DEFAULT_TEMPLATE), style=style)
+        return {"id": request_id, "ok": True, "output": request["output"], "renders": renderer.renders}
+    except Exception as e:
+        return {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+def _respond(renderer, line):
+    try:
+        return handle_request(renderer, json.loads(line))
+    except ValueError as e:
+        return {"id": None, "ok": False, "error": f"Invalid request: {e}"}
+
+def _recycling_response(line):
+    try:
+        request = json.loads(line)
+    except ValueError:
+        request = None
+    request_id = request.get("id") if isinstance(request, dict) else None
+    return {"id": request_id, "ok": False, "recycling": True,
+            "error": "Render server is restarting, send the request again on a new connection"}
+
+def serve(template_dir='templates', socket_path=None, max_renders=500, max_rss_mb=1024):
+    """
+    Long-running render service: one JSON request per line, one JSON response per line,
+    over a Unix socket or stdin/stdout. After `max_renders` renders, or once RSS passes
+    `max_rss_mb`, the process re-executes itself to release WeasyPrint's accumulated memory.
+    """
+    out = sys.stdout
+    # Our own prints must not end up in the response stream
+    sys.stdout = sys.stderr
+    renderer = get_renderer(template_dir)
+    renderer.warm_up()
+    print(f"Render server {os.getpid()} ready ({_rss_mb():.0f} MB RSS).", file=sys.stderr)
+
+    def should_recycle():
+        return renderer.renders >= max_renders or (max_rss_mb and _rss_mb() > max_rss_mb)
+
+    if socket_path:
+        inherited = os.environ.pop(LISTEN_FD_ENV, None)
+        if inherited:
+            # Socket handed over by the previous process, with any clients still in its backlog
+            server = socket.socket(fileno=int(inherited))
+        else:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(socket_path)
+            server.listen()
+        while not should_recycle():
+            conn, _ = server.accept()
+            with conn, conn.makefile('rb') as rfile:
+                recycling = False
+                try:
+                    for line in rfile:
+                        if not line.strip():
+                            continue
+                        response = _recycling_response(line) if recycling else _respond(renderer, line)
+                        conn.sendall((json.dumps(response) + "\n").encode('utf-8'))
+                        if not recycling and should_recycle():
+                            # Requests the client already sent on this connection get an explicit
+                            # "recycling" error rather than no answer; restart once it closes or goes quiet
+                            recycling = True
+                            conn.settimeout(RECYCLE_GRACE)
+                except socket.timeout:
+                    pass
+        server.set_inheritable(True)
+        os.environ[LISTEN_FD_ENV] = str(server.fileno())
+    else:
+        # Unbuffered reads, so nothing past the current request is lost when the process re-executes
+        stdin = os.fdopen(sys.stdin.fileno(), 'rb', buffering=0, closefd=False)
+        while not should_recycle():
+            line = stdin.readline()
+            if not line:
+                return
+            if line.strip():
+                out.write(json.dumps(_respond(renderer, line)) + "\n")
+                out.flush()
+
+    print(f"Render server recycling after {renderer.renders} renders ({_rss_mb():.0f} MB RSS).", file=sys.stderr)
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
+
+def collect_inputs(source):
+    """YAML files of a batch: every *.yaml/*.yml in a directory, or the paths listed in a manifest file."""
+    if os.path.isdir(source):
+        return [os.path.join(source, name) for name in sorted(os.listdir(source))
+                if name.endswith(('.yaml', '.yml'))]
+    if source.endswith(('.yaml', '.yml')):
+        return [source]
+    # Manifest: one path per line, relative to the manifest; blank lines and # comments are skipped
+    base = os.path.dirname(source)
+    with open(source, 'r') as f:
+        lines = [line.strip() for line in f]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith('#')]
+
+def load_styles(path):
+    """Style matrix: a JSON object of name -> style, or a list of styles (named style1, style2, ...)."""
+    if not path:
+        return {"default": {}}
+    with open(path, 'r') as f:
+        styles = json.load(f)
+    if isinstance(styles, list):
+        styles = {f"style{i + 1}": style for i, style in enumerate(styles)}
+    return styles
+
+def output_stems(inputs):
+    """
+    PDF name (without extension) per batch input: the input's file name, prefixed with
+    its parent directory when another input has the same name, and numbered if that
+    still clashes, so no two inputs write the same file.
+    """
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in inputs]
+    counts = Counter(stems)
+    stems = [f"{os.path.basename(os.path.dirname(os.path.abspath(path)))}__{stem}" if counts[stem] > 1 else stem
+             for path, stem in zip(inputs, stems)]
+    counts = Counter(stems)
+    seen = Counter()
+    unique = []
+    for stem in stems:
+        if counts[stem] > 1:
+            seen[stem] += 1
+            stem = f"{stem}__{seen[stem]}"
+        unique.append(stem)
+    return unique
+
+def _render_batch_item(item):
+    """Runs in a batch pool process; never raises, errors go into the report."""
+    started = time.time()
+    result = {"input": item["input"], "style": item["style_name"], "output": item["output"],
+              "pages": None, "error": None, "pid": os.getpid()}
+    try:
+        data = load_data(item["input"])
+        result["pages"] = get_renderer(item["template_dir"]).render(
+            data, item["output"], template_name=item["template"], style=item["style"])
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.time() - started, 3)
+    return result
+
+def render_batch(source, out_dir, styles_path=None, workers=None, report_path=None,
+                 template_dir='templates', template_name=DEFAULT_TEMPLATE):
+    """
+    Renders every input YAML with every style of the matrix across a process pool.
+    Writes one JSON line per PDF (input, style, output, seconds, pages, error) to
+    report_path as results come in, and returns the list of results.
+    """
+    inputs = collect_inputs(source)
+    styles = load_styles(styles_path)
+    os.makedirs(out_dir, exist_ok=True)
+    report_path = report_path or os.path.join(out_dir, 'report.jsonl')
+
+    items = []
+    for path, stem in zip(inputs, output_stems(inputs)):
+        for style_name, style in styles.items():
+            suffix = "" if len(styles) == 1 else f"__{style_name}"
+            items.append({
+                "input": path,
+                "style_name": style_name,
+                "style": style,
+                "output": os.path.join(out_dir, f"{stem}{suffix}.pdf"),
+                "template": template_name,
+                "template_dir": template_dir,
+            })
+    outputs = Counter(item["output"] for item in items)
+    duplicates = sorted(output for output, count in outputs.items() if count > 1)
+    if duplicates:
+        # Would silently overwrite each other while the report lists both as rendered
+        raise ValueError(f"Batch would write these outputs more than once: {', '.join(duplicates)}")
+
+    started = time.time()
+    results = []
+    # Each pool process keeps its own warm renderer for all of its items
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool, open(report_path, 'w') as report:
+        futures = [pool.submit(_render_batch_item, item) for item in items]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            report.write(json.dumps(result) + "\n")
+            report.flush()
+            status = f"error: {result['error']}" if result["error"] else f"{result['pages']} page(s)"
+            print(f"[{len(results)}/{len(items)}] {result['output']} ({result['seconds']}s, {status})")
+
+    failed = sum(1 for result in results if result["error"])
+    print(f"Rendered {len(results) - failed}/{len(items)} PDFs in {time.time() - started:.1f}s, report: {report_path}")
+    return results
+
 def main():
     parser = argparse.ArgumentParser(description='Generate Resume PDF from YAML data.')
     parser.add_argument('--keywords', type=str, help='Comma separated keywords to include in filename (e.g., "LLM,Python")')
     parser.add_argument('--data', type=str, default='resume.yaml', help='Path to YAML data file')
+    parser.add_argument('--style', type=str, help='Path to JSON style file')
+    parser.add_argument('--output', type=str, help='Output PDF path (default: name built from keywords and date)')
+    parser.add_argument('--template', type=str, default=DEFAULT_TEMPLATE, help='Resume template name (templates/<name>.html)')
+    parser.add_argument('--serve', action='store_true', help='Run as a render server reading JSON-line requests')
+    parser.add_argument('--socket', type=str, help='Unix socket for --serve (default: stdin/stdout)')
+    parser.add_argument('--max-renders', type=int, default=500, help='Renders before the server restarts itself')
+    parser.add_argument('--max-rss-mb', type=int, default=1024, help='RSS in MB after which the server restarts itself (0: no limit)')
+    parser.add_argument('--batch', type=str, help='Directory of YAML files, or a manifest listing them, to render in bulk')
+    parser.add_argument('--styles', type=str, help='JSON style matrix for --batch (object of name -> style, or a list)')
+    parser.add_argument('--out-dir', type=str, default='batch_output', help='Output directory for --batch')
+    parser.add_argument('--workers', type=int, help='Worker processes for --batch (default: CPU count)')
+    parser.add_argument('--report', type=str, help='JSONL report path for --batch (default: <out-dir>/report.jsonl)')
     
     args = parser.parse_args()
+
+    if args.serve:
+        serve(socket_path=args.socket, max_renders=args.max_renders, max_rss_mb=args.max_rss_mb)
+        return
+
+    if args.batch:
+        try:
+            results = render_batch(args.batch, args.out_dir, styles_path=args.styles, workers=args.workers,
+                                   report_path=args.report, template_name=args.template)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        sys.exit(1 if any(result["error"] for result in results) else 0)
     
     try:
         data = load_data(args.data)
@@ -33,6 +305,15 @@ def main():
         print(f"Error: Data file '{args.data}' not found.")
         sys.exit(1)
 
+    style = None
+    if args.style:
+        with open(args.style, 'r') as f:
+            style = json.load(f)
+
+    if args.output:
+        generate_pdf(data, args.output, template_name=args.template, style=style)
+        return
+
     # Construct filename
     base_name = "Aishwarya_Birla_Resume"
     date_str = datetime.now().strftime("%Y-%m-%d")
@@ -45,7 +326,7 @@ def main():
     
     output_filename = f"{base_name}{keywords_part}_{date_str}.pdf"
     
-    generate_pdf(data, output_filename)
+    generate_pdf(data, output_filename, template_name=args.template, style=style)
 
 if __name__ == "__main__":
     main()
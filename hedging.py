@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+
+
+class Hedger:
+    """
+    Cuts tail latency of a slow call by racing it against a second, identical call.
+
+    `run(key, func, discard)` calls `func()`. If it hasn't returned after the
+    `percentile`-th percentile of recent successful durations for `key`, a second
+    `func()` is started and whichever succeeds first wins. The other result is
+    passed to `discard` whenever it arrives. Nothing is hedged until `min_samples`
+    durations are known, and hedges are capped at `budget` (a fraction of all calls)
+    so the extra spend stays bounded. `percentile=0` disables hedging.
+
+    `on_event(event, key)`, if given, is called for "hedged", "hedge_won" and "discarded".
+    """
+
+    def __init__(self, percentile=0, min_samples=20, budget=0.1, history=200, on_event=None):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = budget
+        self.history = history
+        self.on_event = on_event
+
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._counters = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_won": 0,
+            "skipped_budget": 0,
+            "discarded": 0,
+        }
+
+    def threshold(self, key):
+        """Seconds after which a call for `key` is hedged, None while hedging is off or untrained."""
+        if not self.percentile:
+            return None
+        with self._lock:
+            durations = sorted(self._durations.get(key, ()))
+        if len(durations) < self.min_samples:
+            return None
+        return durations[min(len(durations) - 1, int(len(durations) * self.percentile / 100))]
+
+    def run(self, key, func, discard):
+        with self._lock:
+            self._counters["calls"] += 1
+        delay = self.threshold(key)
+        if delay is None:
+            started = time.time()
+            result = func()
+            self._record(key, time.time() - started)
+            return result
+
+        primary = self._start(key, func)
+        wait([primary], timeout=delay)
+        if primary.done() or not self._take_budget(key):
+            return primary.result()
+
+        print(f"Hedging {key} call still running after {delay:.1f}s.")
+        hedge = self._start(key, func)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Prefer the primary if both finished together
+            for future in sorted(done, key=lambda f: f is not primary):
+                if future.exception() is None:
+                    loser = hedge if future is primary else primary
+                    loser.add_done_callback(lambda f: self._discard(key, f, discard))
+                    if future is hedge:
+                        self._count("hedge_won", key)
+                    return future.result()
+        # Both failed
+        return primary.result()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            samples = {key: len(durations) for key, durations in self._durations.items()}
+        stats["percentile"] = self.percentile
+        stats["budget"] = self.budget
+        stats["samples"] = samples
+        stats["thresholds_s"] = {}
+        for key in samples:
+            threshold = self.threshold(key)
+            stats["thresholds_s"][key] = round(threshold, 2) if threshold is not None else None
+        return stats
+
+    def _start(self, key, func):
+        future = Future()
+
+        def target():
+            started = time.time()
+            try:
+                result = func()
+            except Exception as e:
+                future.set_exception(e)
+                return
+            self._record(key, time.time() - started)
+            future.set_result(result)
+
+        threading.Thread(target=target, name="hedged-call", daemon=True).start()
+        return future
+
+    def _take_budget(self, key):
+        with self._lock:
+            allowed = self._counters["hedged"] < self.budget * self._counters["calls"]
+        self._count("hedged" if allowed else "skipped_budget", key)
+        return allowed
+
+    def _count(self, event, key):
+        with self._lock:
+            self._counters[event] += 1
+        if self.on_event is not None:
+            self.on_event(event, key)
+
+    def _discard(self, key, future, discard):
+        if future.exception() is not None:
+            return
+        self._count("discarded", key)
+        try:
+            discard(future.result())
+        except Exception as e:
+            print(f"Failed to discard hedged result: {e}")
+
+    def _record(self, key, duration):
+        with self._lock:
+            durations = self._durations.get(key)
+            if durations is None:
+                durations = self._durations[key] = deque(maxlen=self.history)
+            durations.append(duration)
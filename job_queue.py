@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+TERMINAL_STATES = ("done", "failed")
+
+# Identifies jobs started by this process, to tell restarted jobs from ones another worker runs
+PROCESS_TOKEN = uuid.uuid4().hex
+
+
+class JobQueue:
+    """
+    Runs long jobs (PDF generation, resume parsing) off the request path.
+
+    Endpoints submit a function and return the job id right away. The function runs
+    on a background thread and reports stages through a `progress(stage)` callback.
+    Every state change is written to `<user_dir>/jobs/<job_id>.json`, so status and
+    results survive a page reload and can be read by any app process.
+    """
+
+    def __init__(self, user_dir_fn, max_workers=4, keep_jobs=50):
+        self.user_dir_fn = user_dir_fn
+        self.keep_jobs = keep_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._cond = threading.Condition()
+        self._jobs = {}
+
+    def submit(self, user, kind, func, *args, **kwargs):
+        """Queues `func(progress, *args, **kwargs)` and returns the new job id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "id": job_id,
+            "user": user,
+            "kind": kind,
+            "owner": {"pid": os.getpid(), "token": PROCESS_TOKEN},
+            "status": "queued",
+            "stage": "queued",
+            "events": [{"stage": "queued", "at": now}],
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None,
+        }
+        with self._cond:
+            self._jobs[job_id] = job
+            self._persist(job)
+        self._prune(user)
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, user, job_id):
+        """Returns a snapshot of the job, or None if this user has no such job."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job, events=list(job["events"])) if job["user"] == user else None
+
+        path = self._job_path(user, job_id)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job.get("status") not in TERMINAL_STATES and not self._owner_alive(job):
+            # Queued or running on disk but nobody is working on it: the server restarted mid-job
+            job["status"] = "failed"
+            job["error"] = "Job was interrupted by a server restart. Please try again."
+        return job
+
+    def events(self, user, job_id, heartbeat=15):
+        """
+        Yields job snapshots whenever the job changes, ending after a terminal state.
+        Yields None as a heartbeat when nothing changed for `heartbeat` seconds.
+        """
+        last_update = None
+        last_sent = time.time()
+        while True:
+            job = self.get(user, job_id)
+            if job is None:
+                return
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                last_sent = time.time()
+                yield job
+                if job["status"] in TERMINAL_STATES:
+                    return
+            elif time.time() - last_sent >= heartbeat:
+                last_sent = time.time()
+                yield None
+            with self._cond:
+                # Jobs of another app process only change on disk, so never wait too long
+                self._cond.wait(1.0)
+
+    # ------------------------------------------------------------------ internals
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, status="running", stage="running")
+        try:
+            result = func(lambda stage: self._update(job_id, stage=stage), *args, **kwargs)
+            self._update(job_id, status="done", stage="done", result=result)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self._update(job_id, status="failed", stage="failed", error=str(e))
+
+    def _update(self, job_id, **changes):
+        with self._cond:
+            job = self._jobs[job_id]
+            now = time.time()
+            if "stage" in changes and changes["stage"] != job["stage"]:
+                job["events"].append({"stage": changes["stage"], "at": now})
+            job.update(changes)
+            job["updated_at"] = now
+            # Written before the job leaves memory so readers never see a stale state on disk
+            self._persist(job)
+            if job["status"] in TERMINAL_STATES:
+                del self._jobs[job_id]
+            self._cond.notify_all()
+
+    def _owner_alive(self, job):
+        """True if the app process that started an unfinished job is still running."""
+        owner = job.get("owner") or {}
+        if owner.get("token") == PROCESS_TOKEN:
+            # Ours, but no longer in memory
+            return False
+        pid = owner.get("pid")
+        if not pid or pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _job_dir(self, user):
+        return os.path.join(self.user_dir_fn(user), "jobs")
+
+    def _job_path(self, user, job_id):
+        if not job_id.isalnum():
+            return None
+        return os.path.join(self._job_dir(user), f"{job_id}.json")
+
+    def _persist(self, job):
+        job_dir = self._job_dir(job["user"])
+        os.makedirs(job_dir, exist_ok=True)
+        path = os.path.join(job_dir, f"{job['id']}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    def _prune(self, user):
+        """Keeps only the newest `keep_jobs` job records of a user."""
+        job_dir = self._job_dir(user)
+        try:
+            files = [os.path.join(job_dir, name) for name in os.listdir(job_dir) if name.endswith('.json')]
+        except OSError:
+            return
+        files.sort(key=os.path.getmtime, reverse=True)
+        for path in files[self.keep_jobs:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,199 @@
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, 'templates')
+
+# Extra seconds the parent waits past the task timeout before it gives up on the child.
+TIMEOUT_GRACE = 5
+
+
+class TaskTimeoutError(TimeoutError):
+    """Raised when a local task runs longer than its timeout."""
+
+
+class ExecutorBusyError(Exception):
+    """Raised when the local executor's queue is full."""
+
+
+def _init_worker(memory_limit_mb):
+    """Runs once in every pool process: caps its address space."""
+    # The pool already extracts several uploads at once: one page process per upload, unless configured
+    os.environ.setdefault("PDF_EXTRACT_WORKERS", "1")
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+        limit = int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"Could not apply memory limit in local worker: {e}")
+
+
+def _on_alarm(signum, frame):
+    raise TaskTimeoutError("Task timed out")
+
+
+def _run_task(func, timeout, args):
+    """Runs in the pool process. SIGALRM interrupts the task so the process can be reused."""
+    use_alarm = timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(int(timeout))
+    try:
+        return func(*args)
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+
+
+# --------------------------------------------------------------------- tasks
+# Heavy imports happen inside the pool processes, never in the Flask process.
+
+def _extract_task(filename, file_content):
+    from resume_extractor import extract_resume_content
+
+    tmp_dir = tempfile.mkdtemp(prefix='rb-extract-')
+    try:
+        path = os.path.join(tmp_dir, os.path.basename(filename))
+        with open(path, 'wb') as f:
+            f.write(file_content)
+        return extract_resume_content(path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _render_task(resume_data, output_path, style):
+    from generate_resume import generate_pdf
+
+    generate_pdf(resume_data, output_path, template_dir=TEMPLATE_DIR, style=style)
+    return output_path
+
+
+def _analyze_task(resume_text, job_desc_text, use_llm):
+    from ats_analyzer import analyze_keywords, run_ollama_analysis
+
+    analysis = analyze_keywords(resume_text, job_desc_text)
+    if use_llm:
+        analysis["ollama_feedback"] = run_ollama_analysis(resume_text, job_desc_text)
+    return analysis
+
+
+class LocalExecutor:
+    """
+    Runs worker jobs on this machine in a bounded process pool.
+
+    Same job methods as DaytonaOrchestrator, for single-node deployments without
+    a Daytona API key. Each task has a timeout and each pool process a memory cap;
+    at most `max_workers + max_pending` tasks are accepted at once.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None, task_timeout=120, memory_limit_mb=1024):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = self.max_workers * 2 if max_pending is None else max_pending
+        self.task_timeout = task_timeout
+        self.memory_limit_mb = memory_limit_mb
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._pool = None
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "pool_restarts": 0}
+        self._busy_time = 0.0
+
+    # ------------------------------------------------------------------ job methods
+
+    def parse_resume(self, file_path, file_content):
+        return self._submit(_extract_task, file_path, file_content)
+
+    def generate_pdf(self, resume_data, output_path, style=None):
+        return self._submit(_render_task, resume_data, os.path.abspath(output_path), style)
+
+    def analyze_ats(self, resume_text, job_desc_text, use_llm=False):
+        return self._submit(_analyze_task, resume_text, job_desc_text, use_llm)
+
+    # ------------------------------------------------------------------ pool handling
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "backend": "local",
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "task_timeout": self.task_timeout,
+                "memory_limit_mb": self.memory_limit_mb,
+            }
+            stats.update(self._counters)
+            completed = self._counters["completed"]
+            stats["avg_task_s"] = round(self._busy_time / completed, 3) if completed else 0.0
+            return stats
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_mb,),
+                )
+            return self._pool
+
+    def _restart_pool(self, pool):
+        """Replaces a pool whose processes are stuck or dead."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._counters["pool_restarts"] += 1
+        for process in list(getattr(pool, '_processes', {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _submit(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise ExecutorBusyError("Local executor queue is full, try again shortly.")
+        started = time.time()
+        try:
+            pool = self._get_pool()
+            self._count("submitted")
+            future = pool.submit(_run_task, func, self.task_timeout, args)
+            try:
+                result = future.result(timeout=self.task_timeout + TIMEOUT_GRACE if self.task_timeout else None)
+            except FutureTimeoutError:
+                # The alarm didn't fire (e.g. stuck in C code): kill the pool
+                self._count("timeouts")
+                self._restart_pool(pool)
+                raise TaskTimeoutError(f"Task timed out after {self.task_timeout}s")
+            except TaskTimeoutError:
+                self._count("timeouts")
+                raise
+            except BrokenProcessPool:
+                # A pool process died, typically from the memory limit
+                self._count("failed")
+                self._restart_pool(pool)
+                raise Exception("Local worker process died (memory limit exceeded?)")
+            except Exception:
+                self._count("failed")
+                raise
+            with self._lock:
+                self._counters["completed"] += 1
+                self._busy_time += time.time() - started
+            return result
+        finally:
+            self._slots.release()
@@ -0,0 +1,148 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets, from a quick exec to a cold install
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+class Metrics:
+    """
+    In-process counters, gauges and latency histograms, rendered in the Prometheus
+    text format. Every series is identified by its name plus a set of labels, e.g.
+    `observe("phase_duration_seconds", 1.2, phase="create", mode="snapshot")`.
+    """
+
+    def __init__(self, prefix="resumebuilder", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextmanager
+    def timer(self, phase, **labels):
+        """
+        Times the block as `phase_duration_seconds{phase=...}`. If it raises, the
+        exception type is counted in `phase_failures_total` and the duration is
+        recorded with status="error", so failed attempts don't skew the successful ones.
+        """
+        started = time.time()
+        try:
+            yield
+        except Exception as e:
+            self.observe("phase_duration_seconds", time.time() - started, phase=phase, status="error", **labels)
+            self.inc("phase_failures_total", phase=phase, error=type(e).__name__, **labels)
+            raise
+        self.observe("phase_duration_seconds", time.time() - started, phase=phase, status="ok", **labels)
+
+    def quantile(self, name, q, **labels):
+        """
+        Estimates the q-quantile of a histogram by linear interpolation within its
+        bucket, like Prometheus' histogram_quantile(). Returns None without samples.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if not histogram or not histogram["count"]:
+                return None
+            counts = list(histogram["counts"])
+            total = histogram["count"]
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        # Only samples above the largest bucket remain
+        return self.buckets[-1]
+
+    def summary(self, name, quantiles=(0.5, 0.99)):
+        """Returns [{labels, count, p50, p99, ...}] for every series of a histogram."""
+        with self._lock:
+            series = sorted((key[1], h["count"]) for key, h in self._histograms.items() if key[0] == name)
+        rows = []
+        for labels, count in series:
+            row = {"labels": dict(labels), "count": count}
+            for q in quantiles:
+                value = self.quantile(name, q, **dict(labels))
+                row[f"p{int(q * 100)}"] = round(value, 3) if value is not None else None
+            rows.append(row)
+        return rows
+
+    def render(self):
+        """Returns all series in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {key: {"counts": list(h["counts"]), "sum": h["sum"], "count": h["count"]}
+                          for key, h in self._histograms.items()}
+
+        lines = []
+        for kind, series in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({name for name, _ in series}):
+                full = f"{self.prefix}_{name}"
+                if name in self._help:
+                    lines.append(f"# HELP {full} {self._help[name]}")
+                lines.append(f"# TYPE {full} {kind}")
+                for (series_name, labels), value in sorted(series.items()):
+                    if series_name == name:
+                        lines.append(f"{full}{_format_labels(labels)} {value}")
+
+        for name in sorted({name for name, _ in histograms}):
+            full = f"{self.prefix}_{name}"
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} histogram")
+            for (series_name, labels), histogram in sorted(histograms.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram["counts"]):
+                    cumulative += count
+                    lines.append(f"{full}_bucket{_format_labels(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{full}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram['count']}")
+                lines.append(f"{full}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{full}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered PDFs on local disk.
+
+    The key is a SHA-256 of the normalized resume data and style, the template
+    source and the renderer version, so any change to one of them is a miss.
+    Entries are hard-linked in and out (copied when the cache is on another
+    filesystem), and the least recently used ones are evicted once the cache
+    grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024, template_path='templates/resume.html', renderer_version=''):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.template_path = template_path
+        self.renderer_version = renderer_version
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._bytes = 0
+        self._template_hash = None
+        self._template_mtime = None
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def key(self, data, style):
+        normalized = json.dumps({"data": data, "style": style or {}}, sort_keys=True, separators=(',', ':'), default=str)
+        digest = hashlib.sha256()
+        for part in (normalized.encode('utf-8'), self._template_digest().encode(), self.renderer_version.encode()):
+            digest.update(part)
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def fetch(self, key, output_path):
+        """Links the cached PDF for `key` to output_path. Returns False on a miss."""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries:
+                self._counters["misses"] += 1
+                return False
+        try:
+            self._link(path, output_path)
+            os.utime(path)
+        except OSError as e:
+            # Evicted or removed underneath us
+            print(f"Render cache entry {key[:12]} unusable: {e}")
+            with self._lock:
+                self._forget(key)
+                self._counters["misses"] += 1
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (self._entries[key][0], time.time())
+            self._counters["hits"] += 1
+        return True
+
+    def store(self, key, pdf_path):
+        """Adds a freshly rendered PDF. Failures are logged, never raised: the cache is optional."""
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            self._link(pdf_path, tmp_path)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Could not store render in cache: {e}")
+            with self._lock:
+                self._counters["errors"] += 1
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = (size, time.time())
+            self._bytes += size
+            self._counters["stores"] += 1
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+            stats.update(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+    def _template_digest(self):
+        # Re-hashed only when the template file changes
+        mtime = os.path.getmtime(self.template_path)
+        if mtime != self._template_mtime:
+            with open(self.template_path, 'rb') as f:
+                self._template_hash = hashlib.sha256(f.read()).hexdigest()
+            self._template_mtime = mtime
+        return self._template_hash
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _link(self, src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            # Other filesystem, or links not supported
+            shutil.copyfile(src, dst)
+
+    def _load_index(self):
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.tmp'):
+                os.remove(path)
+                continue
+            if not name.endswith('.pdf'):
+                continue
+            st = os.stat(path)
+            self._entries[name[:-4]] = (st.st_size, st.st_mtime)
+            self._bytes += st.st_size
+        self._evict()
+
+    def _forget(self, key):
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry[0]
+
+    def _evict(self):
+        # Caller holds the lock
+        if self._bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._bytes <= self.max_bytes:
+                break
+            self._forget(key)
+            self._counters["evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
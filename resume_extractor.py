@@ -1,14 +1,138 @@
 import os
+import io
+import json
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from pdfminer.converter import TextConverter
 from pdfminer.high_level import extract_text
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
 import docx
 import re
 
-def extract_text_from_pdf(pdf_path):
-    """Extracts raw text from a PDF file."""
+# Page-parallel PDF extraction. Read from the environment so the worker daemon and
+# worker_extractor.py pick them up alike.
+# Processes extracting pages of one PDF (0 or 1: one pass, in this process).
+# Capped by default: extraction may itself run in one of several pool processes.
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+# Pages after this are not extracted (0: no limit)
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "50"))
+# Seconds per page before its text is given up on (pool only)
+PDF_PAGE_TIMEOUT = float(os.environ.get("PDF_PAGE_TIMEOUT", "30"))
+# pdfminer LAParams settings as a JSON object, e.g. {"line_margin": 0.3}
+PDF_LAPARAMS = json.loads(os.environ.get("PDF_LAPARAMS") or "{}")
+
+# Extra seconds the parent waits past the page timeout before it gives up on the pool
+TIMEOUT_GRACE = 5
+
+
+class ExtractionError(Exception):
+    """Raised when no text can be extracted from an uploaded file."""
+
+
+class PageTimeoutError(Exception):
+    """Raised in a pool process when a page takes longer than its timeout."""
+
+
+def _on_alarm(signum, frame):
+    raise PageTimeoutError("Page timed out")
+
+
+def _extract_pages(pdf_path, page_numbers, laparams, timeout):
+    """
+    Runs in a pool process: the text of each page, in order. Pages share one
+    resource manager, so fonts are parsed once per process, not once per page.
+    SIGALRM interrupts a slow page, which then has no text.
+    """
+    use_alarm = timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+    texts = []
+    rsrcmgr = PDFResourceManager(caching=True)
+    with open(pdf_path, 'rb') as f:
+        pages = PDFPage.get_pages(f, pagenos=set(page_numbers))
+        for page_number in page_numbers:
+            page = next(pages)
+            output = io.StringIO()
+            device = TextConverter(rsrcmgr, output, laparams=LAParams(**laparams))
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            try:
+                PDFPageInterpreter(rsrcmgr, device).process_page(page)
+                texts.append(output.getvalue())
+            except PageTimeoutError:
+                print(f"Skipping page {page_number + 1} of {pdf_path}: timed out after {timeout}s", file=sys.stderr)
+                texts.append("")
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+                device.close()
+    return texts
+
+
+def count_pdf_pages(pdf_path):
+    with open(pdf_path, 'rb') as f:
+        return sum(1 for _ in PDFPage.get_pages(f))
+
+
+def _extract_pages_parallel(pdf_path, pages, workers, laparams, page_timeout):
+    # One contiguous run of pages per process
+    size = -(-pages // workers)
+    chunks = [list(range(first, min(first + size, pages))) for first in range(0, pages, size)]
+    # A pool per document: forking is cheap next to extraction, and no processes sit idle
+    # in the local executor's workers between uploads
+    pool = ProcessPoolExecutor(max_workers=len(chunks))
+    texts = []
+    try:
+        futures = [pool.submit(_extract_pages, pdf_path, chunk, laparams, page_timeout) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            try:
+                texts.extend(future.result(timeout=(page_timeout + TIMEOUT_GRACE) * len(chunk) if page_timeout else None))
+            except FutureTimeoutError as e:
+                if type(e) is not FutureTimeoutError:
+                    # A subclass is the caller's own time limit firing while we wait, e.g. the local executor's
+                    raise
+                # The process didn't interrupt itself: keep the pages so far, give up on the rest
+                print(f"Page extraction stuck on pages {chunk[0] + 1}-{chunk[-1] + 1} of {pdf_path}, giving up", file=sys.stderr)
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    # Same as whole-document extract_text(): every page ends with a form feed
+    return "".join(texts)
+
+
+def extract_text_from_pdf(pdf_path, workers=None, max_pages=None, page_timeout=None, laparams=None):
+    """
+    Extracts raw text from a PDF file.
+
+    With more than one of `workers`, pages are extracted in parallel by that many
+    processes and joined in page order; otherwise in this process, in one pass.
+    Pages after `max_pages` are skipped, and a page that takes longer than
+    `page_timeout` seconds contributes no text. Defaults come from the PDF_*
+    environment variables above; `laparams` is a dict of pdfminer LAParams settings.
+    """
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    page_timeout = PDF_PAGE_TIMEOUT if page_timeout is None else page_timeout
+    laparams = PDF_LAPARAMS if laparams is None else laparams
     try:
-        return extract_text(pdf_path)
+        if workers <= 1:
+            # One pass over the file; pdfminer stops at maxpages itself (0 means all)
+            return extract_text(pdf_path, maxpages=max_pages or 0, laparams=LAParams(**laparams))
+        pages = count_pdf_pages(pdf_path)
+        if max_pages and pages > max_pages:
+            print(f"{pdf_path} has {pages} pages, extracting the first {max_pages}", file=sys.stderr)
+            pages = max_pages
+        if pages < 2:
+            return extract_text(pdf_path, maxpages=pages, laparams=LAParams(**laparams))
+        return _extract_pages_parallel(pdf_path, pages, workers, laparams, page_timeout)
+    except TimeoutError:
+        # The caller's own time limit (e.g. the local executor's task timeout), not a bad PDF
+        raise
     except Exception as e:
-        print(f"Error reading PDF: {e}")
+        print(f"Error reading PDF: {e}", file=sys.stderr)
         return ""
 
 def extract_text_from_docx(docx_path):
@@ -17,13 +141,14 @@ def extract_text_from_docx(docx_path):
         doc = docx.Document(docx_path)
         return "\n".join([para.text for para in doc.paragraphs])
     except Exception as e:
-        print(f"Error reading DOCX: {e}")
+        print(f"Error reading DOCX: {e}", file=sys.stderr)
         return ""
 
 def extract_resume_content(file_path):
     """
     Determines file type and extracts text.
-    Returns a formatted string suitable for the editor.
+    Returns a formatted string suitable for the editor. Raises ExtractionError
+    for an unsupported file type or a file without text.
     """
     ext = os.path.splitext(file_path)[1].lower()
     raw_text = ""
@@ -33,10 +158,10 @@ def extract_resume_content(file_path):
     elif ext == '.docx':
         raw_text = extract_text_from_docx(file_path)
     else:
-        return "# Error: Unsupported file format"
+        raise ExtractionError("Unsupported file format")
 
-    if not raw_text:
-        return "# Error: Could not extract text"
+    if not raw_text.strip():
+        raise ExtractionError("Could not extract text")
 
     return basic_formatting(raw_text)
 
@@ -0,0 +1,261 @@
+import datetime
+import json
+import logging
+import yaml
+
+# Values allowed in scalar fields (YAML turns "3.9" and "2020" into numbers, dates into date objects)
+SCALAR_TYPES = (str, int, float, bool, datetime.date)
+
+# libyaml's loader when PyYAML was built with it, several times faster than the pure-Python one
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+log = logging.getLogger(__name__)
+
+# Field kinds, see Record.FIELDS
+SCALAR = 'scalar'
+STRINGS = 'strings'
+
+
+class ValidationError(Exception):
+    """Resume data of the wrong shape. The message starts with the path of the bad value."""
+
+
+# Mismatches already logged: the same saved resume is loaded again on every request
+_reported = set()
+MAX_REPORTED = 1024
+
+
+def _mismatch(message, value, strict):
+    # Saved resumes are free-form YAML: a value of an unexpected shape is kept as is unless strict
+    if strict:
+        raise ValidationError(message)
+    if message not in _reported:
+        if len(_reported) >= MAX_REPORTED:
+            _reported.clear()
+        _reported.add(message)
+        log.debug("Resume data: %s; kept as is", message)
+    return value
+
+
+# Key orders seen so far, shared between records (most records of a kind have the same one)
+_key_orders = {}
+MAX_KEY_ORDERS = 4096
+
+
+def _intern_keys(keys):
+    if len(_key_orders) >= MAX_KEY_ORDERS:
+        return _key_orders.get(keys, keys)
+    return _key_orders.setdefault(keys, keys)
+
+
+def _type_name(value):
+    return type(value).__name__
+
+
+def _convert(kind, value, path, strict):
+    if value is None:
+        return None
+    if kind is SCALAR:
+        if isinstance(value, SCALAR_TYPES):
+            return value
+        return _mismatch(f"{path}: expected a value, got {_type_name(value)}", value, strict)
+    if kind is STRINGS:
+        # Shared with the source, not copied
+        if isinstance(value, list) and all(item is None or isinstance(item, SCALAR_TYPES) for item in value):
+            return value
+        return _mismatch(f"{path}: expected a list of values, got {_type_name(value)}", value, strict)
+    if isinstance(kind, list):
+        if not isinstance(value, list):
+            return _mismatch(f"{path}: expected a list, got {_type_name(value)}", value, strict)
+        return [_convert(kind[0], item, f"{path}[{i}]", strict) for i, item in enumerate(value)]
+    if not isinstance(value, (dict, kind)):
+        return _mismatch(f"{path}: expected a mapping, got {_type_name(value)}", value, strict)
+    return kind.from_dict(value, path, strict)
+
+
+def _plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Record:
+    """
+    Base of the resume model: a read-only mapping over `__slots__`.
+
+    FIELDS maps each known key to its kind: SCALAR, STRINGS (a list of values),
+    a Record class (a nested mapping) or `[RecordClass]` (a list of them). Keys
+    that aren't fields go to `extras`, and the key order of the source dict is
+    kept (as a tuple shared between records), so from_dict()/to_dict() round-trip
+    exactly. Missing keys are unset slots: reading one raises AttributeError
+    (and KeyError as an item), so Jinja sees it as undefined, like a missing
+    dict key, and templates work on records and dicts alike. Use get() for a
+    default.
+
+    A field value of the wrong shape (e.g. a list for `name`) is kept unconverted,
+    so existing resumes keep loading; each such mismatch is logged once at debug
+    level. Pass strict=True to from_dict() to raise ValidationError instead.
+    """
+
+    __slots__ = ('extras', '_keys')
+    FIELDS = {}
+
+    def __init__(self, **fields):
+        self.extras = None
+        self._keys = None
+        for key, value in fields.items():
+            kind = self.FIELDS.get(key)
+            if kind is None:
+                raise TypeError(f"{type(self).__name__} has no field {key!r}")
+            setattr(self, key, _convert(kind, value, key, True))
+
+    @classmethod
+    def from_dict(cls, data, path=None, strict=False):
+        """Converts a plain dict (as loaded from YAML or JSON). Data that isn't a mapping raises ValidationError."""
+        if isinstance(data, cls):
+            return data
+        path = path or cls.__name__
+        if not isinstance(data, dict):
+            raise ValidationError(f"{path}: expected a mapping, got {_type_name(data)}")
+        record = cls.__new__(cls)
+        extras = None
+        fields = cls.FIELDS
+        for key, value in data.items():
+            kind = fields.get(key)
+            if kind is None:
+                if extras is None:
+                    extras = {}
+                extras[key] = value
+            else:
+                setattr(record, key, _convert(kind, value, f"{path}.{key}", strict))
+        record.extras = extras
+        record._keys = _intern_keys(tuple(data))
+        return record
+
+    def to_dict(self):
+        """Plain dicts and lists, in the original key order."""
+        return {key: _plain(self[key]) for key in self.keys()}
+
+    def keys(self):
+        if self._keys is not None:
+            return self._keys
+        keys = tuple(key for key in self.FIELDS if hasattr(self, key))
+        return keys + tuple(self.extras) if self.extras else keys
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extras is None:
+            raise KeyError(key)
+        return self.extras[key]
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Contact(Record):
+    __slots__ = ('email', 'phone', 'location', 'linkedin', 'portfolio_url', 'portfolio_label')
+    FIELDS = dict.fromkeys(__slots__, SCALAR)
+
+
+class EducationItem(Record):
+    __slots__ = ('institution', 'degree', 'gpa', 'date', 'location', 'coursework')
+    FIELDS = dict.fromkeys(__slots__, SCALAR)
+
+
+class ExperienceItem(Record):
+    __slots__ = ('company', 'role', 'location', 'date', 'bullets')
+    FIELDS = dict(dict.fromkeys(__slots__, SCALAR), bullets=STRINGS)
+
+
+class Project(Record):
+    __slots__ = ('name', 'subtitle', 'event', 'award', 'date', 'bullets')
+    FIELDS = dict(dict.fromkeys(__slots__, SCALAR), bullets=STRINGS)
+
+
+class SkillCategory(Record):
+    __slots__ = ('category', 'skills')
+    FIELDS = dict.fromkeys(__slots__, SCALAR)
+
+
+class ResearchPaper(Record):
+    __slots__ = ('title', 'date')
+    FIELDS = dict.fromkeys(__slots__, SCALAR)
+
+
+class Extracurricular(Record):
+    __slots__ = ('bullets', 'research_papers')
+    FIELDS = {'bullets': STRINGS, 'research_papers': [ResearchPaper]}
+
+
+class Resume(Record):
+    """A whole resume. Sections the model doesn't know are kept as plain data in `extras`."""
+
+    __slots__ = ('name', 'contact', 'education', 'technical_skills', 'experience', 'projects', 'extracurricular')
+    FIELDS = {
+        'name': SCALAR,
+        'contact': Contact,
+        'education': [EducationItem],
+        'technical_skills': [SkillCategory],
+        'experience': [ExperienceItem],
+        'projects': [Project],
+        'extracurricular': Extracurricular,
+    }
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_yaml(cls, stream):
+        # An empty file is an empty resume
+        return cls.from_dict(yaml.load(stream, Loader=YAML_LOADER) or {})
+
+    def to_yaml(self, stream=None):
+        return yaml.dump(self.to_dict(), stream, sort_keys=False)
+
+
+def load_resume(path):
+    with open(path, 'r') as f:
+        return Resume.from_yaml(f)
+
+
+def save_resume(resume, path):
+    with open(path, 'w') as f:
+        Resume.from_dict(resume).to_yaml(f)
@@ -1,5 +1,7 @@
 import yaml
 import re
+import threading
+from resume_model import Record, Resume
 
 SECTION_MAPPING = {
     'edcation': 'education',
@@ -23,6 +25,8 @@ SECTION_MAPPING = {
 }
 
 def to_text(data):
+    if isinstance(data, Record):
+        data = data.to_dict()
     lines = []
     
     # Name (Always first)
@@ -91,117 +95,149 @@ def to_text(data):
 
     return "\n".join(lines)
 
+# Line classifier: one match per meaningful line, found in a single regex pass over the
+# whole text. Lines are matched as if str.strip()ped: leading whitespace is skipped, and
+# "## ", "### " and "- " only count when something other than whitespace follows them.
+_LINE_TOKEN = re.compile(
+    r'^[^\S\n]*(?:'
+    r'# Name:(.*)'              # 1: name
+    r'|## (.*\S)'               # 2: section
+    r'|### (.*\S)'              # 3: item
+    r'|- (.*\S)'                # 4: bullet
+    r'|([^:\n]*):(.*)'          # 5, 6: key: value
+    r')',
+    re.MULTILINE,
+)
+_NAME, _SECTION, _ITEM, _BULLET, _KEY, _VALUE = range(1, 7)
+
+# Container of each section until its items show up
+def _new_section(section_key):
+    if section_key == 'contact':
+        return {}
+    if section_key == 'extracurricular':
+        return {'bullets': [], 'research_papers': []}
+    return []
+
+# Item created by a ### header, by section; other sections use the generic {'name', 'bullets'}
+_ITEM_TITLE_KEYS = {
+    'education': 'institution',
+    'experience': 'company',
+    'projects': 'name',
+}
+
 def parse_text(text):
     data = {}
     current_section = None
-    current_item = None # For list items (edu, exp, proj)
-    
-    lines = text.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Top level name
-        if line.startswith("# Name:"):
-            data['name'] = line.replace("# Name:", "").strip()
-            continue
-            
-        # Section Headers
-        if line.startswith("## "):
-            # Store raw section name to preserve user intent, but normalize key
-            raw_section = line.replace("## ", "").strip()
-            normalized_key = raw_section.lower().replace(" ", "_")
-            section_key = SECTION_MAPPING.get(normalized_key, normalized_key)
-            current_section = section_key
-            current_item = None
-            
-            # Initialize container based on likely type
-            # We can't know for sure until we see items, but we can default to list
-            # unless it's contact or specific known dicts
-            if section_key == 'contact':
-                data[section_key] = {}
-            elif section_key == 'extracurricular':
-                 data[section_key] = {'bullets': [], 'research_papers': []}
-            else:
-                data[section_key] = [] 
-            continue
-            
-        # Item Headers (###)
-        if line.startswith("### "):
-            header_val = line.replace("### ", "").strip()
-            
-            # Special case for Research Papers
-            if current_section == 'extracurricular' and header_val.startswith("Research Paper:"):
-                title = header_val.replace("Research Paper:", "").strip()
-                current_item = {'title': title}
-                if 'research_papers' not in data[current_section]:
-                    data[current_section]['research_papers'] = []
-                data[current_section]['research_papers'].append(current_item)
-                continue
-
-            # General List Item
-            if isinstance(data.get(current_section), list):
-                # We need to guess the "title key" (institution, company, name)
-                # But since we are parsing TO yaml, we can normalize.
-                # OR we can just use a temporary dict and fix it later?
-                # Better: Use context.
-                if current_section == 'education':
-                    current_item = {'institution': header_val}
-                elif current_section == 'experience':
-                    current_item = {'company': header_val, 'bullets': []}
-                elif current_section == 'projects':
-                    current_item = {'name': header_val, 'bullets': []}
-                else:
-                    # Generic fallback: treat ### as "name" or "title"
-                    current_item = {'name': header_val, 'bullets': []}
-                
-                data[current_section].append(current_item)
-            continue
-            
-        # List Items (-)
-        if line.startswith("- "):
-            bullet_val = line[2:].strip()
-            
-            # Technical Skills (Category: Skills)
-            if current_section == 'technical_skills':
-                 if ':' in bullet_val:
-                    cat, skills = bullet_val.split(':', 1)
-                    data[current_section].append({
-                        'category': cat.strip(),
-                        'skills': skills.strip()
-                    })
-                 continue
-
-            # Generic Bullets
-            if current_section == 'extracurricular':
-                 if current_item is None:
-                     if 'bullets' not in data[current_section]: data[current_section]['bullets'] = []
-                     data[current_section]['bullets'].append(bullet_val)
-                 continue
-
-            if current_item is not None and 'bullets' in current_item:
-                current_item['bullets'].append(bullet_val)
-            continue
-            
-        # Key: Value pairs
-        if ':' in line:
-            key, val = line.split(':', 1)
-            key = key.strip().lower().replace(" ", "_")
-            val = val.strip()
-            
+    current_item = None  # For list items (edu, exp, proj)
+    container = None     # data[current_section]
+
+    for match in _LINE_TOKEN.finditer(text):
+        kind = match.lastindex
+        if kind == _VALUE:
+            # Key: Value pairs
+            key = match.group(_KEY).strip().lower().replace(" ", "_")
+            val = match.group(_VALUE).strip()
             if current_section == 'contact':
-                data[current_section][key] = val
+                container[key] = val
             elif current_item is not None:
                 current_item[key] = val
-            elif isinstance(data.get(current_section), dict):
-                 # Generic dict fields
-                 data[current_section][key] = val
-            continue
+            elif isinstance(container, dict):
+                # Generic dict fields
+                container[key] = val
+
+        elif kind == _BULLET:
+            bullet_val = match.group(_BULLET).strip()
+            if current_section == 'technical_skills':
+                # Technical Skills (Category: Skills)
+                if ':' in bullet_val:
+                    cat, skills = bullet_val.split(':', 1)
+                    container.append({'category': cat.strip(), 'skills': skills.strip()})
+            elif current_section == 'extracurricular':
+                if current_item is None:
+                    container['bullets'].append(bullet_val)
+            elif current_item is not None and 'bullets' in current_item:
+                current_item['bullets'].append(bullet_val)
+
+        elif kind == _ITEM:
+            header_val = match.group(_ITEM).replace("### ", "").strip()
+            if current_section == 'extracurricular' and header_val.startswith("Research Paper:"):
+                # Special case for Research Papers
+                current_item = {'title': header_val.replace("Research Paper:", "").strip()}
+                container['research_papers'].append(current_item)
+            elif isinstance(container, list):
+                title_key = _ITEM_TITLE_KEYS.get(current_section, 'name')
+                current_item = {title_key: header_val}
+                if current_section != 'education':
+                    current_item['bullets'] = []
+                container.append(current_item)
+
+        elif kind == _SECTION:
+            # Store raw section name to preserve user intent, but normalize key
+            normalized_key = match.group(_SECTION).replace("## ", "").strip().lower().replace(" ", "_")
+            current_section = SECTION_MAPPING.get(normalized_key, normalized_key)
+            current_item = None
+            container = data[current_section] = _new_section(current_section)
+
+        else:
+            # Top level name
+            data['name'] = match.group(_NAME).replace("# Name:", "").strip()
 
     return data
 
+def parse_resume(text):
+    """parse_text() as a validated Resume (see resume_model.py)."""
+    return Resume.from_dict(parse_text(text))
+
+# Section header lines, as classified by _LINE_TOKEN. Parser state is reset at each one.
+_SECTION_LINE = re.compile(r'^[^\S\n]*## .*\S', re.MULTILINE)
+
+def split_sections(text):
+    """Splits text into the part before the first section and one chunk per `## ` section."""
+    starts = [match.start() for match in _SECTION_LINE.finditer(text)]
+    bounds = [0] + starts + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+class IncrementalParser:
+    """
+    Re-parses only the sections of a resume text that changed since the last call.
+
+    parse_text() state is reset at every `## ` header, so each section parses the
+    same on its own as within the full text. The parse of every chunk from the
+    previous call is kept, keyed by its text, and merged in document order exactly
+    like parse_text() would. The result shares those parses with the cache: treat
+    it as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chunks = {}
+        self._counters = {"parses": 0, "chunks_parsed": 0, "chunks_reused": 0}
+
+    def parse(self, text):
+        with self._lock:
+            chunks = {}
+            data = {}
+            for chunk in split_sections(text):
+                parsed = chunks.get(chunk, self._chunks.get(chunk))
+                if parsed is None:
+                    parsed = parse_text(chunk)
+                    self._counters["chunks_parsed"] += 1
+                else:
+                    self._counters["chunks_reused"] += 1
+                chunks[chunk] = parsed
+                for key, value in parsed.items():
+                    data[key] = value
+            # Only the current document's chunks are kept
+            self._chunks = chunks
+            self._counters["parses"] += 1
+            return data
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["cached_chunks"] = len(self._chunks)
+            return stats
+
 if __name__ == "__main__":
     # Test with existing yaml
     with open('resume.yaml', 'r') as f:
@@ -0,0 +1,324 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no worker becomes available within the lease timeout."""
+
+
+class _PooledWorker:
+    def __init__(self, sandbox):
+        now = time.time()
+        self.sandbox = sandbox
+        self.created_at = now
+        self.last_used = now
+        self.last_checked = now
+        self.leases = 0
+
+
+class SandboxPool:
+    """
+    Keeps provisioned, dependency-ready worker sandboxes warm between jobs.
+
+    The pool does not talk to Daytona itself. It is given three callables:
+    `provision()` returns a ready sandbox, `destroy(sandbox)` tears one down and
+    `health_check(sandbox)` returns True if the sandbox can still run commands.
+    This keeps it usable with a fake client in tests.
+
+    `min_size` workers are kept warm in the background, at most `max_size`
+    workers exist at once (leased + idle + being provisioned), and idle workers
+    above `min_size` are evicted after `idle_timeout` seconds. An `idle_timeout`
+    of 0 disables reuse: every worker is destroyed when it is returned. Workers
+    older than `max_lifetime` seconds (0 = no limit) are retired instead of reused.
+    """
+
+    def __init__(self, provision, destroy, health_check=None, min_size=0, max_size=4,
+                 idle_timeout=600, health_check_interval=60, lease_timeout=120,
+                 maintenance_interval=15, max_lifetime=0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.provision = provision
+        self.destroy = destroy
+        self.health_check = health_check
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.lease_timeout = lease_timeout
+        self.maintenance_interval = maintenance_interval
+        self.max_lifetime = max_lifetime
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._leased = {}
+        self._provisioning = 0
+        self._closed = False
+        self._thread = None
+
+        self._counters = {
+            "leases": 0,
+            "warm_leases": 0,
+            "cold_leases": 0,
+            "provisioned": 0,
+            "provision_failures": 0,
+            "destroyed": 0,
+            "evicted_idle": 0,
+            "retired": 0,
+            "health_check_failures": 0,
+            "lease_timeouts": 0,
+        }
+        self._lease_wait_total = 0.0
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        """Starts the background thread that warms and maintains the pool."""
+        with self._cond:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._maintenance_loop, name="sandbox-pool", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stops maintenance and destroys all idle workers. Leased workers are destroyed on return."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for worker in idle:
+            self._destroy(worker)
+
+    # ------------------------------------------------------------------ lease / return
+
+    def lease(self, timeout=None):
+        """
+        Returns a ready sandbox, reusing an idle one when possible.
+        Blocks while the pool is at `max_size`; raises PoolExhaustedError after `timeout`.
+        """
+        timeout = self.lease_timeout if timeout is None else timeout
+        started = time.time()
+        deadline = started + timeout
+
+        while True:
+            worker = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise Exception("Sandbox pool is closed.")
+                    if self._idle:
+                        # LIFO: the most recently used worker is the least likely to be stale
+                        worker = self._idle.pop()
+                        self._leased[worker.sandbox.id] = worker
+                        break
+                    if self._size() < self.max_size:
+                        self._provisioning += 1
+                        break
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self._counters["lease_timeouts"] += 1
+                        raise PoolExhaustedError(f"No worker available after {timeout}s (max_size={self.max_size}).")
+                    self._cond.wait(remaining)
+
+            if worker is None:
+                worker = self._provision_worker(for_lease=True)
+                warm = False
+            else:
+                if self._expired(worker, time.time()):
+                    with self._cond:
+                        self._leased.pop(worker.sandbox.id, None)
+                        self._counters["retired"] += 1
+                    self._destroy(worker)
+                    continue
+                if not self._check(worker):
+                    with self._cond:
+                        self._leased.pop(worker.sandbox.id, None)
+                    self._destroy(worker)
+                    continue
+                warm = True
+
+            with self._cond:
+                worker.leases += 1
+                self._counters["leases"] += 1
+                self._counters["warm_leases" if warm else "cold_leases"] += 1
+                self._lease_wait_total += time.time() - started
+            return worker.sandbox
+
+    def release(self, sandbox, healthy=True):
+        """Returns a leased sandbox. Unhealthy workers are destroyed instead of reused."""
+        with self._cond:
+            worker = self._leased.pop(sandbox.id, None)
+            if worker is None:
+                return
+            keep = healthy and not self._closed and self.idle_timeout > 0
+            if keep and self._expired(worker, time.time()):
+                keep = False
+                self._counters["retired"] += 1
+            if keep:
+                worker.last_used = time.time()
+                self._idle.append(worker)
+            self._cond.notify()
+        if not keep:
+            self._destroy(worker)
+
+    @contextmanager
+    def worker(self, timeout=None):
+        """Context manager around lease()/release()."""
+        sandbox = self.lease(timeout)
+        try:
+            yield sandbox
+        finally:
+            self.release(sandbox)
+
+    # ------------------------------------------------------------------ stats
+
+    def stats(self):
+        with self._cond:
+            stats = {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "idle_timeout": self.idle_timeout,
+                "max_lifetime": self.max_lifetime,
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "provisioning": self._provisioning,
+                "total": self._size(),
+            }
+            stats.update(self._counters)
+            leases = self._counters["leases"]
+            stats["avg_lease_wait_s"] = round(self._lease_wait_total / leases, 3) if leases else 0.0
+            stats["warm_hit_rate"] = round(self._counters["warm_leases"] / leases, 3) if leases else 0.0
+            return stats
+
+    # ------------------------------------------------------------------ internals
+
+    def _size(self):
+        return len(self._idle) + len(self._leased) + self._provisioning
+
+    def _expired(self, worker, now):
+        return self.max_lifetime > 0 and now - worker.created_at > self.max_lifetime
+
+    def _provision_worker(self, for_lease=False):
+        """Provisions a worker. The caller must already have reserved a slot in `_provisioning`."""
+        try:
+            sandbox = self.provision()
+        except Exception:
+            with self._cond:
+                self._provisioning -= 1
+                self._counters["provision_failures"] += 1
+                self._cond.notify()
+            raise
+        worker = _PooledWorker(sandbox)
+        closed = False
+        with self._cond:
+            self._provisioning -= 1
+            self._counters["provisioned"] += 1
+            if for_lease:
+                self._leased[sandbox.id] = worker
+            elif self._closed:
+                closed = True
+            else:
+                self._idle.append(worker)
+                self._cond.notify()
+        if closed:
+            self._destroy(worker)
+        return worker
+
+    def _check(self, worker):
+        if self.health_check is None:
+            return True
+        if time.time() - worker.last_checked < self.health_check_interval:
+            return True
+        try:
+            ok = self.health_check(worker.sandbox)
+        except Exception as e:
+            print(f"Health check failed for sandbox {worker.sandbox.id}: {e}")
+            ok = False
+        if ok:
+            worker.last_checked = time.time()
+        else:
+            with self._cond:
+                self._counters["health_check_failures"] += 1
+        return ok
+
+    def _destroy(self, worker):
+        try:
+            self.destroy(worker.sandbox)
+        except Exception as e:
+            print(f"Error destroying pooled sandbox {worker.sandbox.id}: {e}")
+        with self._cond:
+            self._counters["destroyed"] += 1
+            self._cond.notify()
+
+    def _maintenance_loop(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+            try:
+                self._maintain()
+            except Exception as e:
+                print(f"Sandbox pool maintenance error: {e}")
+            with self._cond:
+                if self._closed:
+                    return
+                self._cond.wait(self.maintenance_interval)
+
+    def _maintain(self):
+        """Evicts idle and expired workers, health-checks the rest and tops the pool up to `min_size`."""
+        now = time.time()
+        evict = []
+        retire = []
+        check = []
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            remaining = self._size() + len(idle)
+            # Idle workers are ordered by last return, so the longest-idle ones are evicted first
+            for worker in idle:
+                if self._expired(worker, now):
+                    # Replaced by the top-up below
+                    retire.append(worker)
+                    remaining -= 1
+                elif remaining > self.min_size and now - worker.last_used > self.idle_timeout:
+                    evict.append(worker)
+                    remaining -= 1
+                else:
+                    check.append(worker)
+            # Workers being checked are out of the idle list so they can't be leased mid-check
+            self._provisioning += len(check)
+
+        for worker in evict:
+            with self._cond:
+                self._counters["evicted_idle"] += 1
+            self._destroy(worker)
+        for worker in retire:
+            with self._cond:
+                self._counters["retired"] += 1
+            self._destroy(worker)
+
+        healthy = [w for w in check if self._check(w)]
+        with self._cond:
+            self._provisioning -= len(check)
+            if not self._closed:
+                for worker in reversed(healthy):
+                    self._idle.appendleft(worker)
+                self._cond.notify_all()
+            else:
+                healthy = []
+        for worker in check:
+            if worker not in healthy:
+                self._destroy(worker)
+
+        while True:
+            with self._cond:
+                if self._closed or self._size() >= self.min_size:
+                    return
+                self._provisioning += 1
+            try:
+                self._provision_worker()
+            except Exception as e:
+                print(f"Failed to warm pool worker: {e}")
+                return
@@ -0,0 +1,155 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class SandboxReaper:
+    """
+    Deletes sandboxes in the background, off the request path.
+
+    `submit(sandbox)` queues a deletion and returns at once. At most
+    `max_concurrent` deletions run at the same time; a failed deletion is retried
+    with exponential backoff up to `max_attempts` times. If `find_orphans()` is
+    given, it is called every `sweep_interval` seconds and every sandbox it
+    returns is queued too, so sandboxes leaked by a crashed process get cleaned up.
+    """
+
+    def __init__(self, delete, find_orphans=None, max_concurrent=2, max_attempts=5,
+                 retry_delay=5, sweep_interval=300):
+        self.delete = delete
+        self.find_orphans = find_orphans
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.sweep_interval = sweep_interval
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._pending = set()
+        self._active = 0
+        self._threads = []
+        self._closed = False
+        # The sweep sleeps on its own event, so deletions never wake it early
+        self._stopped = threading.Event()
+
+        self._counters = {
+            "submitted": 0,
+            "deleted": 0,
+            "retries": 0,
+            "failed": 0,
+            "orphans_found": 0,
+            "sweeps": 0,
+            "sweep_failures": 0,
+        }
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        """Starts the deletion threads and, if configured, the orphan sweep."""
+        with self._cond:
+            if self._threads or self._closed:
+                return
+            for i in range(self.max_concurrent):
+                self._threads.append(threading.Thread(target=self._delete_loop, name=f"sandbox-reaper-{i}", daemon=True))
+            if self.find_orphans is not None and self.sweep_interval > 0:
+                self._threads.append(threading.Thread(target=self._sweep_loop, name="sandbox-reaper-sweep", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def close(self, timeout=30):
+        """Stops the sweep and waits up to `timeout` seconds for queued deletions to finish."""
+        deadline = time.time() + timeout
+        self._stopped.set()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            while (self._queue or self._active) and self._threads:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    print(f"Sandbox reaper closed with {len(self._queue) + self._active} deletion(s) unfinished.")
+                    break
+                self._cond.wait(remaining)
+
+    # ------------------------------------------------------------------ queue
+
+    def submit(self, sandbox):
+        """Queues a sandbox for deletion. Sandboxes already queued are ignored."""
+        with self._cond:
+            if sandbox.id in self._pending:
+                return False
+            self._pending.add(sandbox.id)
+            heapq.heappush(self._queue, (time.time(), next(self._seq), sandbox, 1))
+            self._counters["submitted"] += 1
+            self._cond.notify()
+        return True
+
+    def stats(self):
+        with self._cond:
+            stats = {
+                "max_concurrent": self.max_concurrent,
+                "queued": len(self._queue),
+                "deleting": self._active,
+            }
+            stats.update(self._counters)
+            return stats
+
+    # ------------------------------------------------------------------ internals
+
+    def _delete_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.time()
+                    if self._queue and self._queue[0][0] <= now:
+                        _, _, sandbox, attempt = heapq.heappop(self._queue)
+                        self._active += 1
+                        break
+                    if self._closed and not self._queue:
+                        return
+                    self._cond.wait(self._queue[0][0] - now if self._queue else None)
+
+            try:
+                self.delete(sandbox)
+                ok = True
+            except Exception as e:
+                print(f"Failed to delete sandbox {sandbox.id} (attempt {attempt}/{self.max_attempts}): {e}")
+                ok = False
+
+            with self._cond:
+                self._active -= 1
+                if ok:
+                    self._counters["deleted"] += 1
+                    self._pending.discard(sandbox.id)
+                elif attempt < self.max_attempts:
+                    self._counters["retries"] += 1
+                    due = time.time() + self.retry_delay * 2 ** (attempt - 1)
+                    heapq.heappush(self._queue, (due, next(self._seq), sandbox, attempt + 1))
+                else:
+                    self._counters["failed"] += 1
+                    self._pending.discard(sandbox.id)
+                    print(f"Giving up on deleting sandbox {sandbox.id}; the orphan sweep will retry it later.")
+                self._cond.notify_all()
+
+    def _sweep_loop(self):
+        # First sweep right away: leftovers of a crashed predecessor are likely at startup
+        while True:
+            self._sweep()
+            if self._stopped.wait(self.sweep_interval):
+                return
+
+    def _sweep(self):
+        try:
+            orphans = list(self.find_orphans())
+        except Exception as e:
+            print(f"Orphan sandbox sweep failed: {e}")
+            with self._cond:
+                self._counters["sweep_failures"] += 1
+            return
+        found = sum(1 for sandbox in orphans if self.submit(sandbox))
+        with self._cond:
+            self._counters["sweeps"] += 1
+            self._counters["orphans_found"] += found
+        if found:
+            print(f"Orphan sweep queued {found} sandbox(es) for deletion.")
@@ -0,0 +1,291 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+import uuid
+
+# Base64 characters sent per exec when the SDK has no file upload. Linux caps a single argument at 128 KiB.
+CHUNK_SIZE = 96 * 1024
+
+# Raw bytes per ranged read when the SDK has no streaming download.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Content-addressed store in the worker for files that may outlive a job (scripts, templates).
+BLOB_DIR = ".rb_blobs"
+
+# Runs inside the worker. Unpacks the uploaded archive and places every file of the
+# manifest, taking files that were not shipped from the blob store.
+UNPACK_SCRIPT = """
+import base64, hashlib, io, json, os, shutil, sys, tarfile
+
+manifest = json.loads(base64.b64decode(MANIFEST_B64).decode('utf-8'))
+blob_dir = manifest['blob_dir']
+blobs = {}
+
+archive = manifest.get('archive')
+if archive:
+    with open(archive, 'rb') as f:
+        data = f.read()
+    if manifest.get('archive_b64'):
+        data = base64.b64decode(data)
+    os.remove(archive)
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+        for member in tar.getmembers():
+            blobs[member.name] = tar.extractfile(member).read()
+
+missing = []
+for entry in manifest['files']:
+    sha = entry['sha']
+    dest = os.path.join(manifest['base'], entry['path'])
+    dest_dir = os.path.dirname(dest)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    blob_path = os.path.join(blob_dir, sha)
+    content = blobs.get(sha)
+    if content is None:
+        if not os.path.exists(blob_path):
+            missing.append(sha)
+            continue
+        shutil.copyfile(blob_path, dest)
+        continue
+    if hashlib.sha256(content).hexdigest() != sha:
+        print(json.dumps({'error': 'checksum mismatch', 'path': entry['path']}))
+        sys.exit(2)
+    with open(dest, 'wb') as f:
+        f.write(content)
+    if entry['cache'] and not os.path.exists(blob_path):
+        os.makedirs(blob_dir, exist_ok=True)
+        tmp = blob_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, blob_path)
+
+if missing:
+    print(json.dumps({'missing': missing}))
+    sys.exit(3)
+print(json.dumps({'written': len(manifest['files'])}))
+"""
+
+# Runs inside the worker. Lists artifacts matching the globs with their size and SHA-256.
+LIST_SCRIPT = """
+import base64, glob, hashlib, json, os
+
+request = json.loads(base64.b64decode(REQUEST_B64).decode('utf-8'))
+found = []
+for pattern in request['patterns']:
+    for path in sorted(glob.glob(os.path.join(request['base'], pattern))):
+        if not os.path.isfile(path):
+            continue
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        found.append({'path': path, 'size': os.path.getsize(path), 'sha256': digest.hexdigest()})
+print(json.dumps(found))
+"""
+
+# Runs inside the worker. Prints one base64 slice of a file (fallback download path).
+READ_RANGE_SCRIPT = """
+import base64, sys
+with open(PATH, 'rb') as f:
+    f.seek(OFFSET)
+    sys.stdout.write(base64.b64encode(f.read(LENGTH)).decode('ascii'))
+"""
+
+
+class MissingBlobsError(Exception):
+    """Raised when the worker no longer has blobs we expected it to have."""
+
+    def __init__(self, missing):
+        super().__init__(f"Worker is missing {len(missing)} cached file(s)")
+        self.missing = missing
+
+
+class SandboxTransfer:
+    """
+    Bulk file transfer into worker sandboxes.
+
+    All files of a job are packed into one gzip'd tar, uploaded (through the
+    SDK's file API when it has one, else base64 in chunks) and unpacked with a
+    single exec. Files marked cacheable are also kept in a
+    content-addressed store on the worker; later uploads of the same content
+    skip them and only ship their hash. User data should never be marked
+    cacheable so that it is wiped together with the job directory.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._known = {}
+        self._lock = threading.Lock()
+        self.stats = {"uploads": 0, "files": 0, "files_skipped": 0, "bytes_raw": 0, "bytes_sent": 0, "execs": 0,
+                      "downloads": 0, "bytes_received": 0}
+
+    def upload(self, sandbox, files, base='.', cacheable=()):
+        """
+        Uploads `files` (path -> str or bytes, relative to `base`) to the sandbox.
+        Paths listed in `cacheable` may be served from the worker blob store.
+        """
+        entries = []
+        contents = {}
+        for path, content in files.items():
+            if isinstance(content, str):
+                content = content.encode('utf-8')
+            sha = hashlib.sha256(content).hexdigest()
+            contents[sha] = content
+            entries.append({"path": path, "sha": sha, "cache": path in cacheable})
+
+        try:
+            self._upload(sandbox, entries, contents, base, force=())
+        except MissingBlobsError as e:
+            # Blob store was cleared behind our back: forget what we knew and ship everything once more
+            print(f"Worker {sandbox.id} lost {len(e.missing)} cached file(s), re-sending.")
+            self.forget(sandbox)
+            self._upload(sandbox, entries, contents, base, force=set(e.missing))
+
+    def list_artifacts(self, sandbox, patterns, base='.'):
+        """Returns [{path, size, sha256}] for worker files matching the glob `patterns` under `base`."""
+        request = {"base": base, "patterns": list(patterns)}
+        res = self._run_script(sandbox, LIST_SCRIPT, REQUEST_B64=base64.b64encode(json.dumps(request).encode('utf-8')).decode('ascii'))
+        if res.exit_code != 0:
+            raise Exception(f"Failed to list artifacts: {res.result}")
+        return json.loads(res.result.strip().splitlines()[-1])
+
+    def download(self, sandbox, artifacts, dest_paths):
+        """
+        Streams artifacts (as returned by list_artifacts) to the matching local paths.
+
+        Each file is written to `<dest>.part` chunk by chunk, checked against the size
+        and SHA-256 reported by the worker and only then moved into place, so memory use
+        stays at one chunk regardless of artifact size.
+        """
+        for artifact, dest in zip(artifacts, dest_paths):
+            started = time.time()
+            tmp = dest + '.part'
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with open(tmp, 'wb') as f:
+                    for chunk in self._stream(sandbox, artifact):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                if size != artifact["size"]:
+                    raise Exception(f"Size mismatch for {artifact['path']}: expected {artifact['size']}, got {size}")
+                if digest.hexdigest() != artifact["sha256"]:
+                    raise Exception(f"Checksum mismatch for {artifact['path']}")
+                os.replace(tmp, dest)
+            except Exception:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._count("downloads", 1)
+            self._count("bytes_received", size)
+            print(f"Downloaded {artifact['path']} ({size} bytes) in {time.time() - started:.2f}s.")
+        return dest_paths
+
+    def _stream(self, sandbox, artifact):
+        """Yields the artifact content in chunks."""
+        fs = getattr(sandbox, 'fs', None)
+        if fs is not None and hasattr(fs, 'download_file_stream'):
+            # Binary transfer over the toolbox API, no base64 through stdout
+            yield from fs.download_file_stream(artifact["path"])
+            return
+        # Older SDKs: ranged reads, so only one chunk is ever held in memory
+        for offset in range(0, artifact["size"], DOWNLOAD_CHUNK_SIZE):
+            res = self._run_script(sandbox, READ_RANGE_SCRIPT, PATH=artifact["path"], OFFSET=offset, LENGTH=DOWNLOAD_CHUNK_SIZE)
+            if res.exit_code != 0:
+                raise Exception(f"Failed to read {artifact['path']} at offset {offset}: {res.result}")
+            yield base64.b64decode(res.result.strip())
+
+    def _run_script(self, sandbox, script, **constants):
+        """Runs a Python script in the worker with the given constants defined in front of it."""
+        header = "".join(f"{name} = {value!r}\n" for name, value in constants.items())
+        script_b64 = base64.b64encode((header + script).encode('utf-8')).decode('ascii')
+        self._count("execs", 1)
+        return sandbox.process.exec(f"python -c \"import base64; exec(base64.b64decode('{script_b64}').decode('utf-8'))\"")
+
+    def forget(self, sandbox):
+        """Drops the cached-blob record of a sandbox (call when it is deleted)."""
+        with self._lock:
+            self._known.pop(sandbox.id, None)
+
+    def _upload(self, sandbox, entries, contents, base, force):
+        with self._lock:
+            known = set(self._known.get(sandbox.id, ()))
+
+        ship = {}
+        for entry in entries:
+            sha = entry["sha"]
+            if entry["cache"] and sha in known and sha not in force:
+                continue
+            ship[sha] = contents[sha]
+
+        archive_path = None
+        archive_b64 = False
+        sent = 0
+        if ship:
+            archive = self._pack(ship)
+            # Under base, so a job's wipe of its directory also removes an archive left by a failed upload
+            archive_path = os.path.join(base, f".rb_upload_{uuid.uuid4().hex[:12]}")
+            fs = getattr(sandbox, 'fs', None)
+            if fs is not None and hasattr(fs, 'upload_file'):
+                # Binary transfer over the toolbox API, no base64 through exec arguments
+                if os.path.dirname(archive_path):
+                    fs.create_folder(os.path.dirname(archive_path), "755")
+                fs.upload_file(archive, archive_path)
+                sent = len(archive)
+            else:
+                payload = base64.b64encode(archive).decode('ascii')
+                self._send_chunks(sandbox, archive_path, payload)
+                archive_b64 = True
+                sent = len(payload)
+
+        manifest = {"base": base, "blob_dir": BLOB_DIR, "archive": archive_path, "archive_b64": archive_b64, "files": entries}
+        manifest_b64 = base64.b64encode(json.dumps(manifest).encode('utf-8')).decode('ascii')
+
+        started = time.time()
+        res = self._run_script(sandbox, UNPACK_SCRIPT, MANIFEST_B64=manifest_b64)
+        if res.exit_code == 3:
+            missing = json.loads(res.result.strip().splitlines()[-1]).get("missing", [])
+            raise MissingBlobsError(missing)
+        if res.exit_code != 0:
+            raise Exception(f"Failed to unpack upload: {res.result}")
+
+        with self._lock:
+            record = self._known.setdefault(sandbox.id, set())
+            record.update(e["sha"] for e in entries if e["cache"])
+        self._count("uploads", 1)
+        self._count("files", len(entries))
+        self._count("files_skipped", len(entries) - len([e for e in entries if e["sha"] in ship]))
+        self._count("bytes_raw", sum(len(contents[e["sha"]]) for e in entries))
+        self._count("bytes_sent", sent)
+        print(f"Uploaded {len(entries)} file(s) to {sandbox.id} ({len(ship)} shipped, {sent} bytes) in {time.time() - started:.2f}s.")
+
+    def _pack(self, blobs):
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode='w:gz') as tar:
+            for sha, content in blobs.items():
+                info = tarfile.TarInfo(name=sha)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+        return buf.getvalue()
+
+    def _send_chunks(self, sandbox, remote_path, payload):
+        for i in range(0, len(payload), self.chunk_size):
+            chunk = payload[i:i + self.chunk_size]
+            redirect = '>' if i == 0 else '>>'
+            command = f"printf '%s' '{chunk}' {redirect} {remote_path}"
+            if i == 0 and os.path.dirname(remote_path):
+                command = f"mkdir -p {os.path.dirname(remote_path)} && {command}"
+            res = sandbox.process.exec(command)
+            self._count("execs", 1)
+            if res.exit_code != 0:
+                raise Exception(f"Failed to upload chunk {i // self.chunk_size} of {remote_path}: {res.result}")
+
+    def _count(self, key, value):
+        with self._lock:
+            self.stats[key] += value
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+# Resume templates are templates/resume.html ("resume") plus any templates/resume_<name>.html ("resume_<name>")
+TEMPLATE_PREFIX = 'resume'
+DEFAULT_TEMPLATE = 'resume'
+
+
+class TemplateRegistry:
+    """
+    Compiled resume templates shared by the HTML preview and the PDF renderer.
+
+    Each template is compiled once and recompiled only when its file's mtime
+    changes; the directory is listed again only when it changes or a lookup
+    misses. Compiled bytecode is also written to a FileSystemBytecodeCache
+    (JINJA_CACHE_DIR, or Jinja's per-user temp directory), so a fresh worker
+    process loads it instead of compiling the template again.
+    """
+
+    def __init__(self, template_dir='templates', autoescape=False, bytecode_cache_dir=None):
+        self.template_dir = template_dir
+        cache_dir = bytecode_cache_dir or os.environ.get("JINJA_CACHE_DIR")
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=autoescape,
+            auto_reload=True,
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+        )
+        self._lock = threading.Lock()
+        self._name_set = None
+        self._dir_mtime = None
+
+    def _names(self, rescan=False):
+        """
+        The set of template names. The directory is listed again only when its
+        mtime changed (a template was added or removed) or `rescan` is set.
+        """
+        mtime = os.stat(self.template_dir).st_mtime_ns
+        with self._lock:
+            if rescan or self._name_set is None or mtime != self._dir_mtime:
+                names = set()
+                for filename in os.listdir(self.template_dir):
+                    stem, ext = os.path.splitext(filename)
+                    if ext == '.html' and (stem == TEMPLATE_PREFIX or stem.startswith(TEMPLATE_PREFIX + '_')):
+                        names.add(stem)
+                self._name_set, self._dir_mtime = names, mtime
+            return self._name_set
+
+    def names(self):
+        """Names of the resume templates in the template directory."""
+        return sorted(self._names())
+
+    def get(self, name=DEFAULT_TEMPLATE):
+        if name.endswith('.html'):
+            name = name[:-len('.html')]
+        if name not in self._names() and name not in self._names(rescan=True):
+            raise Exception(f"Unknown resume template: {name}")
+        return self.env.get_template(f"{name}.html")
+
+    def render(self, name=DEFAULT_TEMPLATE, **context):
+        return self.get(name).render(**context)
+
+    def section_hashes(self, name, resume, style):
+        """
+        Content hash of every block of the template, for incremental previews.
+
+        Blocks are the resume sections: `style` (the CSS) depends on the style
+        options, `title` on the name, `header` on the name and contact details,
+        and every other block on the resume key it is named after. A hash changes when those inputs or
+        the template file change.
+        """
+        template = self.get(name)
+        version = f"{template.name}:{os.path.getmtime(template.filename)}"
+        hashes = {}
+        for block in template.blocks:
+            payload = json.dumps([version, block, section_inputs(block, resume, style)], sort_keys=True, default=_plain)
+            hashes[block] = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        return hashes
+
+    def render_sections(self, name, blocks, **context):
+        """Renders only the given blocks. Each fragment is an element with a data-section attribute."""
+        template = self.get(name)
+        ctx = template.new_context(context)
+        return {block: "".join(template.blocks[block](ctx)) for block in blocks}
+
+
+def _plain(value):
+    # Resume model records (resume_model.py) hash like the dicts they came from
+    return value.to_dict() if hasattr(value, 'to_dict') else str(value)
+
+
+def section_inputs(block, resume, style):
+    """The data a template block renders, see TemplateRegistry.section_hashes()."""
+    if block == 'style':
+        return style
+    if block == 'title':
+        return resume.get('name')
+    if block == 'header':
+        return [resume.get('name'), resume.get('contact')]
+    return resume.get(block)
+
+
+_registries = {}
+_lock = threading.Lock()
+
+
+def get_registry(template_dir='templates', autoescape=False):
+    """One registry per template directory and escaping mode, shared within the process."""
+    key = (os.path.abspath(template_dir), autoescape)
+    with _lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = TemplateRegistry(template_dir, autoescape=autoescape)
+        return registry
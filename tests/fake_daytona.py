@@ -0,0 +1,69 @@
+import itertools
+import threading
+
+
+class FakeResponse:
+    def __init__(self, exit_code=0, result=""):
+        self.exit_code = exit_code
+        self.result = result
+
+
+class FakeProcess:
+    def __init__(self, sandbox):
+        self.sandbox = sandbox
+        self.commands = []
+
+    def exec(self, command, *args, **kwargs):
+        self.commands.append(command)
+        if self.sandbox.deleted:
+            raise Exception(f"Sandbox {self.sandbox.id} not found")
+        if not self.sandbox.healthy:
+            return FakeResponse(1, "sandbox is not responding")
+        return FakeResponse(0, "ok\n")
+
+
+class FakeSandbox:
+    def __init__(self, sandbox_id, labels=None):
+        self.id = sandbox_id
+        self.labels = labels or {}
+        self.healthy = True
+        self.deleted = False
+        self.process = FakeProcess(self)
+
+
+class FakeDaytona:
+    """
+    In-memory stand-in for the Daytona client: create(), delete() and list() on
+    sandboxes whose process.exec() answers until the sandbox is marked unhealthy.
+    """
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.sandboxes = {}
+        self.deleted = []
+        self.fail_creates = 0
+        self.list_calls = 0
+
+    def create(self, params=None, *args, **kwargs):
+        with self._lock:
+            if self.fail_creates:
+                self.fail_creates -= 1
+                raise Exception("Sandbox creation failed")
+            sandbox = FakeSandbox(f"sb-{next(self._ids)}", getattr(params, 'labels', None))
+            self.sandboxes[sandbox.id] = sandbox
+            return sandbox
+
+    def delete(self, sandbox, *args, **kwargs):
+        with self._lock:
+            if self.sandboxes.pop(sandbox.id, None) is None:
+                raise Exception(f"Sandbox {sandbox.id} not found")
+            sandbox.deleted = True
+            self.deleted.append(sandbox.id)
+
+    def list(self, query=None, *args, **kwargs):
+        labels = getattr(query, 'labels', None) or {}
+        with self._lock:
+            self.list_calls += 1
+            return [s for s in self.sandboxes.values()
+                    if all(s.labels.get(k) == v for k, v in labels.items())]
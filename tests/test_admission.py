@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+class AdmissionControllerTest(unittest.TestCase):
+    def test_ticket_not_yet_waiting_does_not_block_ready_ones(self):
+        # The first ticket's job is still queued for a job thread and never calls slot()
+        admission = AdmissionController(max_concurrent=2, max_queue=4, queue_timeout=0.5)
+        admission.admit("a")
+        ready = admission.admit("b")
+        started = time.time()
+        with admission.slot(ready):
+            pass
+
+        self.assertLess(time.time() - started, 0.1)
+        self.assertEqual(admission.stats()["pending"], 1)
+
+    def test_queue_timeout_counts_from_slot(self):
+        admission = AdmissionController(queue_timeout=0.05)
+        ticket = admission.admit("a")
+        time.sleep(0.1)
+        with admission.slot(ticket):
+            pass
+
+        self.assertEqual(admission.stats()["queue_timeouts"], 0)
+
+    def test_waiting_ticket_times_out(self):
+        admission = AdmissionController(max_concurrent=1, queue_timeout=0.05)
+        first, second = admission.admit("a"), admission.admit("b")
+        running = threading.Event()
+        done = threading.Event()
+
+        def hold():
+            with admission.slot(first):
+                running.set()
+                done.wait(5)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        running.wait(5)
+        with self.assertRaises(AdmissionRejected):
+            with admission.slot(second):
+                pass
+        done.set()
+        holder.join(5)
+
+        stats = admission.stats()
+        self.assertEqual((stats["queue_timeouts"], stats["pending"], stats["waiting"]), (1, 0, 0))
+
+    def test_max_queue_counts_admitted_tickets_not_started(self):
+        admission = AdmissionController(max_queue=2, max_per_user=5)
+        first = admission.admit("a")
+        admission.admit("a")
+        with self.assertRaises(AdmissionRejected):
+            admission.admit("a")
+
+        admission.cancel(first)
+        self.assertIsNotNone(admission.admit("a"))
+
+    def test_per_user_limit(self):
+        admission = AdmissionController(max_per_user=1)
+        ticket = admission.admit("a")
+        with self.assertRaises(AdmissionRejected):
+            admission.admit("a")
+        self.assertIsNotNone(admission.admit("b"))
+
+        with admission.slot(ticket):
+            pass
+        self.assertIsNotNone(admission.admit("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from contextlib import contextmanager
+
+from admission import AdmissionController, AdmissionRejected
+from ats_engine import ATSEngine
+from metrics import Metrics
+
+
+class FakeOrchestrator:
+    def __init__(self, admission):
+        self.admission = admission
+        self.metrics = Metrics()
+        self.running_during_call = []
+
+    def analyze_ats(self, resume_text, job_desc_text, use_llm=False):
+        self.running_during_call.append(self.admission.stats()["running"])
+        return {"score": 50, "missing_keywords": []}
+
+
+class ATSEngineTest(unittest.TestCase):
+    def make_engine(self, **kwargs):
+        self.admission = AdmissionController(**kwargs)
+        self.orchestrator = FakeOrchestrator(self.admission)
+        engine = ATSEngine(self.orchestrator)
+        # As if NLTK data were missing on the app host
+        engine._local_unavailable = "LookupError: stopwords"
+        return engine
+
+    def worker_slot(self, user):
+        @contextmanager
+        def slot():
+            with self.admission.slot(self.admission.admit(user)):
+                yield
+        return slot
+
+    def test_worker_fallback_holds_admission_slot(self):
+        engine = self.make_engine()
+        result = engine.analyze("python", "python", worker_slot=self.worker_slot("a"))
+
+        self.assertEqual(result["tier"], "keywords_worker")
+        self.assertEqual(self.orchestrator.running_during_call, [1])
+        self.assertEqual(self.admission.stats()["running"], 0)
+
+    def test_refused_admission_skips_worker(self):
+        engine = self.make_engine(max_per_user=1)
+        held = self.admission.admit("a")
+        with self.assertRaises(AdmissionRejected):
+            engine.analyze("python", "python", use_llm=True, worker_slot=self.worker_slot("a"))
+
+        self.assertEqual(self.orchestrator.running_during_call, [])
+        self.admission.cancel(held)
+
+
+if __name__ == '__main__':
+    unittest.main()
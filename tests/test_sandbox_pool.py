@@ -0,0 +1,160 @@
+import threading
+import time
+import unittest
+
+from sandbox_pool import PoolExhaustedError, SandboxPool
+from tests.fake_daytona import FakeDaytona
+
+
+def check_worker(sandbox):
+    # Same check as DaytonaOrchestrator.check_worker
+    return sandbox.process.exec("echo ok").exit_code == 0
+
+
+class SandboxPoolTest(unittest.TestCase):
+    def make_pool(self, **kwargs):
+        self.daytona = FakeDaytona()
+        options = dict(health_check=check_worker, max_size=2, health_check_interval=0, lease_timeout=1)
+        options.update(kwargs)
+        pool = SandboxPool(self.daytona.create, self.daytona.delete, **options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_release_keeps_worker_warm(self):
+        pool = self.make_pool()
+        first = pool.lease()
+        pool.release(first)
+        second = pool.lease()
+
+        self.assertIs(second, first)
+        stats = pool.stats()
+        self.assertEqual((stats["cold_leases"], stats["warm_leases"]), (1, 1))
+        self.assertEqual((stats["leased"], stats["idle"]), (1, 0))
+        self.assertEqual(first.process.commands, ["echo ok"])
+
+    def test_unhealthy_release_destroys_worker(self):
+        pool = self.make_pool()
+        sandbox = pool.lease()
+        pool.release(sandbox, healthy=False)
+
+        self.assertTrue(sandbox.deleted)
+        self.assertEqual(pool.stats()["total"], 0)
+        self.assertIsNot(pool.lease(), sandbox)
+
+    def test_zero_idle_timeout_disables_reuse(self):
+        pool = self.make_pool(idle_timeout=0)
+        sandbox = pool.lease()
+        pool.release(sandbox)
+
+        self.assertTrue(sandbox.deleted)
+
+    def test_lease_times_out_when_pool_is_full(self):
+        pool = self.make_pool(max_size=1)
+        pool.lease()
+
+        with self.assertRaises(PoolExhaustedError):
+            pool.lease(timeout=0.05)
+        self.assertEqual(pool.stats()["lease_timeouts"], 1)
+
+    def test_release_wakes_waiting_lease(self):
+        pool = self.make_pool(max_size=1)
+        sandbox = pool.lease()
+        leased = []
+        waiter = threading.Thread(target=lambda: leased.append(pool.lease(timeout=5)))
+        waiter.start()
+        time.sleep(0.05)
+        pool.release(sandbox)
+        waiter.join(5)
+
+        self.assertEqual(leased, [sandbox])
+
+    def test_expired_worker_is_retired_on_release(self):
+        pool = self.make_pool(max_lifetime=0.05)
+        sandbox = pool.lease()
+        time.sleep(0.1)
+        pool.release(sandbox)
+
+        self.assertTrue(sandbox.deleted)
+        self.assertEqual(pool.stats()["retired"], 1)
+
+    def test_expired_idle_worker_is_replaced_on_lease(self):
+        pool = self.make_pool(max_lifetime=0.05)
+        old = pool.lease()
+        pool.release(old)
+        time.sleep(0.1)
+        new = pool.lease()
+
+        self.assertIsNot(new, old)
+        self.assertTrue(old.deleted)
+        stats = pool.stats()
+        self.assertEqual((stats["retired"], stats["cold_leases"]), (1, 2))
+
+    def test_failed_health_check_on_lease_replaces_worker(self):
+        pool = self.make_pool()
+        old = pool.lease()
+        pool.release(old)
+        old.healthy = False
+        new = pool.lease()
+
+        self.assertIsNot(new, old)
+        self.assertTrue(old.deleted)
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+
+    def test_health_check_exception_counts_as_failure(self):
+        pool = self.make_pool(health_check=lambda sandbox: 1 / 0)
+        old = pool.lease()
+        pool.release(old)
+
+        self.assertIsNot(pool.lease(), old)
+        self.assertEqual(pool.stats()["health_check_failures"], 1)
+
+    def test_maintenance_evicts_idle_and_unhealthy_workers(self):
+        pool = self.make_pool(max_size=3, min_size=1, idle_timeout=0.05)
+        sandboxes = [pool.lease() for _ in range(3)]
+        for sandbox in sandboxes:
+            pool.release(sandbox)
+        sandboxes[2].healthy = False
+        time.sleep(0.1)
+        pool._maintain()
+
+        stats = pool.stats()
+        self.assertEqual(stats["idle"], 1)
+        self.assertEqual((stats["evicted_idle"], stats["health_check_failures"]), (2, 1))
+        self.assertTrue(all(sandbox.deleted for sandbox in sandboxes))
+        self.assertEqual(len(self.daytona.sandboxes), 1)
+
+    def test_maintenance_replaces_failed_worker_to_keep_min_size(self):
+        pool = self.make_pool(min_size=1)
+        pool._maintain()
+        (sandbox,) = self.daytona.sandboxes.values()
+        sandbox.healthy = False
+        pool._maintain()
+
+        self.assertTrue(sandbox.deleted)
+        self.assertEqual(pool.stats()["idle"], 1)
+        self.assertNotIn(sandbox.id, self.daytona.sandboxes)
+        self.assertEqual(len(self.daytona.sandboxes), 1)
+
+    def test_failed_provision_frees_its_slot(self):
+        pool = self.make_pool(max_size=1)
+        self.daytona.fail_creates = 1
+        with self.assertRaises(Exception):
+            pool.lease()
+
+        self.assertIsNotNone(pool.lease())
+        self.assertEqual(pool.stats()["provision_failures"], 1)
+
+    def test_close_destroys_idle_and_returned_workers(self):
+        pool = self.make_pool()
+        idle, leased = pool.lease(), pool.lease()
+        pool.release(idle)
+        pool.close()
+        pool.release(leased)
+
+        self.assertTrue(idle.deleted and leased.deleted)
+        with self.assertRaises(Exception):
+            pool.lease()
+
+
+if __name__ == '__main__':
+    unittest.main()
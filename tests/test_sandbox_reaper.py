@@ -0,0 +1,69 @@
+import time
+import unittest
+
+from sandbox_reaper import SandboxReaper
+from tests.fake_daytona import FakeDaytona
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class SandboxReaperTest(unittest.TestCase):
+    def make_reaper(self, **kwargs):
+        self.daytona = FakeDaytona()
+
+        def find_orphans():
+            # Lists like the real sweep; nothing is an orphan here
+            self.daytona.list()
+            return []
+
+        reaper = SandboxReaper(self.daytona.delete, find_orphans=find_orphans, **kwargs)
+        reaper.start()
+        self.addCleanup(reaper.close, 1)
+        return reaper
+
+    def test_deletions_do_not_trigger_sweeps(self):
+        reaper = self.make_reaper(max_concurrent=1, sweep_interval=60)
+        self.assertTrue(wait_for(lambda: reaper.stats()["sweeps"] == 1))
+        for _ in range(10):
+            reaper.submit(self.daytona.create())
+
+        self.assertTrue(wait_for(lambda: reaper.stats()["deleted"] == 10))
+        self.assertEqual(self.daytona.list_calls, 1)
+        self.assertEqual(reaper.stats()["sweeps"], 1)
+
+    def test_submit_wakes_a_delete_worker(self):
+        reaper = self.make_reaper(max_concurrent=1, sweep_interval=60)
+        self.assertTrue(wait_for(lambda: reaper.stats()["sweeps"] == 1))
+        sandbox = self.daytona.create()
+        reaper.submit(sandbox)
+
+        self.assertTrue(wait_for(lambda: sandbox.deleted, timeout=1))
+
+    def test_failed_deletion_is_retried(self):
+        reaper = self.make_reaper(retry_delay=0.01, sweep_interval=0)
+        sandbox = self.daytona.create()
+        self.daytona.delete(sandbox)
+        reaper.submit(sandbox)
+
+        self.assertTrue(wait_for(lambda: reaper.stats()["failed"] == 1))
+        self.assertEqual(reaper.stats()["retries"], 4)
+
+    def test_close_stops_the_sweep(self):
+        reaper = self.make_reaper(sweep_interval=0.05)
+        self.assertTrue(wait_for(lambda: reaper.stats()["sweeps"] >= 2))
+        reaper.close(1)
+        sweeps = reaper.stats()["sweeps"]
+        time.sleep(0.15)
+
+        self.assertEqual(reaper.stats()["sweeps"], sweeps)
+
+
+if __name__ == '__main__':
+    unittest.main()
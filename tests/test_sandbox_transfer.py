@@ -0,0 +1,104 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from sandbox_transfer import SandboxTransfer
+from tests.fake_daytona import FakeResponse
+
+
+class LocalProcess:
+    """Runs worker commands with the shell in the sandbox's directory."""
+
+    def __init__(self, root, fail_on=None):
+        self.root = root
+        self.fail_on = fail_on
+
+    def exec(self, command, *args, **kwargs):
+        if self.fail_on and self.fail_on in command:
+            return FakeResponse(1, "simulated failure")
+        # The worker's `python` is this interpreter
+        command = command.replace("python -c", f"{sys.executable} -c", 1)
+        res = subprocess.run(command, shell=True, cwd=self.root, capture_output=True, text=True)
+        return FakeResponse(res.returncode, res.stdout + res.stderr)
+
+
+class LocalFs:
+    """The SDK's file API, writing under the sandbox's directory."""
+
+    def __init__(self, root):
+        self.root = root
+        self.uploads = []
+
+    def create_folder(self, path, mode):
+        os.makedirs(os.path.join(self.root, path), exist_ok=True)
+
+    def upload_file(self, file, remote_path):
+        self.uploads.append(remote_path)
+        with open(os.path.join(self.root, remote_path), 'wb') as f:
+            f.write(file)
+
+
+class LocalSandbox:
+    def __init__(self, fail_on=None, with_fs=False):
+        self.id = "local"
+        self.root = tempfile.mkdtemp(prefix="rb-sandbox-")
+        self.process = LocalProcess(self.root, fail_on)
+        if with_fs:
+            self.fs = LocalFs(self.root)
+
+
+class SandboxTransferTest(unittest.TestCase):
+    def make_sandbox(self, **kwargs):
+        sandbox = LocalSandbox(**kwargs)
+        self.addCleanup(shutil.rmtree, sandbox.root, True)
+        return sandbox
+
+    def test_upload_writes_files_under_base(self):
+        sandbox = self.make_sandbox()
+        os.makedirs(os.path.join(sandbox.root, "job-1"))
+        SandboxTransfer().upload(sandbox, {"resume.yaml": "name: Jane\n", "sub/style.json": b"{}"}, base="job-1")
+
+        with open(os.path.join(sandbox.root, "job-1", "resume.yaml")) as f:
+            self.assertEqual(f.read(), "name: Jane\n")
+        self.assertTrue(os.path.exists(os.path.join(sandbox.root, "job-1", "sub", "style.json")))
+        self.assertEqual(os.listdir(sandbox.root), ["job-1"])
+
+    def test_upload_creates_missing_base(self):
+        sandbox = self.make_sandbox()
+        SandboxTransfer().upload(sandbox, {"worker.py": "print('hi')\n"}, base=".rb_app")
+
+        self.assertEqual(os.listdir(os.path.join(sandbox.root, ".rb_app")), ["worker.py"])
+
+    def test_upload_uses_file_api_when_available(self):
+        sandbox = self.make_sandbox(with_fs=True)
+        commands = []
+        exec_command = sandbox.process.exec
+        sandbox.process.exec = lambda command, *args, **kwargs: commands.append(command) or exec_command(command)
+        content = os.urandom(300 * 1024)
+        SandboxTransfer().upload(sandbox, {"resume.pdf": content}, base="job-1")
+
+        with open(os.path.join(sandbox.root, "job-1", "resume.pdf"), 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(len(sandbox.fs.uploads), 1)
+        # Only the unpack step runs as a command
+        self.assertEqual(len(commands), 1)
+        self.assertEqual(os.listdir(os.path.join(sandbox.root, "job-1")), ["resume.pdf"])
+
+    def test_failed_upload_leaves_archive_in_base_only(self):
+        # The unpack step fails after all chunks were written
+        sandbox = self.make_sandbox(fail_on="python -c")
+        os.makedirs(os.path.join(sandbox.root, "job-1"))
+        with self.assertRaises(Exception):
+            SandboxTransfer(chunk_size=64).upload(sandbox, {"resume.pdf": os.urandom(500)}, base="job-1")
+
+        self.assertEqual(os.listdir(sandbox.root), ["job-1"])
+        leftovers = os.listdir(os.path.join(sandbox.root, "job-1"))
+        self.assertEqual(len(leftovers), 1)
+        self.assertTrue(leftovers[0].startswith(".rb_upload_"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import template_registry
+from template_registry import TemplateRegistry
+
+
+class TemplateRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="rb-templates-")
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.write("resume.html", "{{ title }}")
+        self.registry = TemplateRegistry(self.dir, bytecode_cache_dir=os.path.join(self.dir, ".cache"))
+
+    def write(self, filename, text):
+        with open(os.path.join(self.dir, filename), 'w') as f:
+            f.write(text)
+
+    def count_listdir(self):
+        listdir = mock.patch.object(template_registry.os, 'listdir', wraps=os.listdir)
+        self.addCleanup(listdir.stop)
+        return listdir.start()
+
+    def test_renders_list_directory_once(self):
+        listdir = self.count_listdir()
+        for _ in range(3):
+            self.assertEqual(self.registry.render("resume", title="Jane"), "Jane")
+
+        self.assertEqual(listdir.call_count, 1)
+
+    def test_new_template_is_found(self):
+        self.registry.get("resume")
+        self.write("resume_compact.html", "compact")
+
+        self.assertEqual(self.registry.render("resume_compact"), "compact")
+        self.assertEqual(self.registry.names(), ["resume", "resume_compact"])
+
+    def test_miss_rescans_before_failing(self):
+        self.registry.get("resume")
+        listdir = self.count_listdir()
+        with self.assertRaises(Exception):
+            self.registry.get("resume_missing")
+
+        self.assertEqual(listdir.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+"""
+Resident worker process for sandboxes.
+
+Loads pdfminer, WeasyPrint, Jinja2 and NLTK once and then serves JSON-line
+requests, so jobs on the same sandbox don't pay for imports and NLTK data
+checks every time.
+
+    python worker_daemon.py serve --socket /tmp/rb-worker.sock   # local socket
+    python worker_daemon.py serve --stdio                          # stdin/stdout
+    python worker_daemon.py call --socket /tmp/rb-worker.sock --request <base64 json>
+
+Request:  {"id": 1, "op": "extract" | "render" | "render_batch" | "analyze" | "ping", "args": {...}}
+Response: {"id": 1, "ok": true, "result": ...} or {"id": 1, "ok": false, "error": "..."}
+"""
+import argparse
+import base64
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_SOCKET = "/tmp/rb-worker.sock"
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Exit code of `call` when no daemon is listening
+EXIT_UNAVAILABLE = 75
+
+# Handlers used by forked render_batch processes
+_batch_handlers = None
+
+
+class WorkerHandlers:
+    def __init__(self, version=None):
+        self.version = version
+        self.started_at = time.time()
+        self.served = 0
+        # The expensive part, done once per daemon instead of once per job
+        self._modules = {}
+        self._import_errors = {}
+        for name in ('resume_extractor', 'generate_resume', 'ats_analyzer'):
+            try:
+                self._modules[name] = importlib.import_module(name)
+            except Exception as e:
+                # Keep serving the other ops, e.g. extraction still works without Pango
+                traceback.print_exc(file=sys.stderr)
+                self._import_errors[name] = f"{type(e).__name__}: {e}"
+
+    def _module(self, name):
+        if name in self._import_errors:
+            raise Exception(f"{name} is unavailable in this worker: {self._import_errors[name]}")
+        return self._modules[name]
+
+    def handle(self, request):
+        request_id = request.get("id")
+        op = request.get("op")
+        handler = getattr(self, f"op_{op}", None)
+        if handler is None:
+            return {"id": request_id, "ok": False, "error": f"Unknown op: {op}"}
+        try:
+            result = handler(request.get("args") or {})
+            self.served += 1
+            return {"id": request_id, "ok": True, "result": result}
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return {"id": request_id, "ok": False, "error": str(e)}
+
+    def _path(self, args, key):
+        path = args[key]
+        return path if os.path.isabs(path) else os.path.join(args.get("cwd", "."), path)
+
+    def op_ping(self, args):
+        return {"version": self.version, "pid": os.getpid(), "served": self.served,
+                "uptime_s": round(time.time() - self.started_at, 1), "import_errors": self._import_errors}
+
+    def op_extract(self, args):
+        return self._module("resume_extractor").extract_resume_content(self._path(args, "path"))
+
+    def op_render(self, args):
+        generate_resume = self._module("generate_resume")
+        data = args.get("data")
+        if data is None:
+            data = generate_resume.load_data(self._path(args, "data_path"))
+        style = args.get("style")
+        if style is None and "style_path" in args:
+            with open(self._path(args, "style_path"), 'r') as f:
+                style = json.load(f)
+        output = self._path(args, "output")
+        # Templates ship with the daemon code unless the job brings its own
+        template_dir = self._path(args, "template_dir") if "template_dir" in args else TEMPLATE_DIR
+        generate_resume.generate_pdf(data, output, template_dir=template_dir, template_name=args.get("template", "resume"), style=style)
+        return {"output": output}
+
+    def op_render_batch(self, args):
+        """
+        Renders several variants, in parallel processes when there is more than one CPU.
+        Returns one {"output": ...} or {"error": ...} per item, in order.
+        """
+        self._module("generate_resume")
+        items = [dict(item, cwd=args.get("cwd", ".")) for item in args["items"]]
+        workers = min(len(items), args.get("max_workers") or os.cpu_count() or 1)
+        global _batch_handlers
+        _batch_handlers = self
+        if workers <= 1:
+            return [_render_item(item) for item in items]
+        # Forked children inherit the handlers with the already imported renderer
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            return list(pool.map(_render_item, items))
+
+    def op_analyze(self, args):
+        with open(self._path(args, "resume_path"), 'r') as f:
+            resume_text = f.read()
+        with open(self._path(args, "job_desc_path"), 'r') as f:
+            job_text = f.read()
+        ats_analyzer = self._module("ats_analyzer")
+        analysis = ats_analyzer.analyze_keywords(resume_text, job_text)
+        if args.get("ollama"):
+            analysis["ollama_feedback"] = ats_analyzer.run_ollama_analysis(resume_text, job_text)
+        return analysis
+
+
+def _render_item(item):
+    try:
+        return _batch_handlers.op_render(item)
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        return {"error": str(e)}
+
+
+def serve_stdio(handlers, out):
+    """One JSON request per stdin line, one JSON response per `out` line."""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            response = handlers.handle(json.loads(line))
+        except ValueError as e:
+            response = {"id": None, "ok": False, "error": f"Invalid request: {e}"}
+        out.write(json.dumps(response) + "\n")
+        out.flush()
+
+
+def serve_socket(handlers, path):
+    if os.path.exists(path):
+        os.remove(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    response = handlers.handle(json.loads(line))
+                except ValueError as e:
+                    response = {"id": None, "ok": False, "error": f"Invalid request: {e}"}
+                self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+                self.wfile.flush()
+
+    with socketserver.UnixStreamServer(path, Handler) as server:
+        print(f"Worker daemon {os.getpid()} listening on {path}", file=sys.stderr)
+        server.serve_forever()
+
+
+def call(path, request, timeout=600):
+    """Sends one request to a running daemon and returns its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode('utf-8'))
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+    return json.loads(buf.decode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resident resume worker.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help='Run the daemon')
+    serve.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path')
+    serve.add_argument('--stdio', action='store_true', help='Serve over stdin/stdout instead of a socket')
+    serve.add_argument('--version', default=None, help='Code version reported by ping')
+
+    client = sub.add_parser('call', help='Send one request to a running daemon')
+    client.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path')
+    client.add_argument('--request', required=True, help='Base64-encoded JSON request')
+    client.add_argument('--timeout', type=float, default=600)
+
+    args = parser.parse_args()
+
+    if args.command == 'call':
+        request = json.loads(base64.b64decode(args.request).decode('utf-8'))
+        try:
+            response = call(args.socket, request, timeout=args.timeout)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            print(json.dumps({"id": request.get("id"), "ok": False, "error": f"Daemon unavailable: {e}"}))
+            sys.exit(EXIT_UNAVAILABLE)
+        print(json.dumps(response))
+        sys.exit(0 if response.get("ok") else 1)
+
+    out = sys.stdout
+    if args.stdio:
+        # Library prints (import warnings, "Resume generated: ...") must not end up in the protocol stream
+        sys.stdout = sys.stderr
+    handlers = WorkerHandlers(version=args.version)
+    if args.stdio:
+        serve_stdio(handlers, out)
+    else:
+        serve_socket(handlers, args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+
+REQUIREMENTS_FILE = "worker_requirements.txt"
+PYTHON_VERSION = "3.11"
+
+# Shared libraries WeasyPrint needs at runtime (see .devcontainer/setup.sh)
+SYSTEM_PACKAGES = [
+    "libpango-1.0-0",
+    "libpangoft2-1.0-0",
+    "libpangocairo-1.0-0",
+    "libcairo2",
+    "libffi-dev",
+    "shared-mime-info",
+    "curl",
+]
+
+NLTK_DATA = ["punkt", "stopwords"]
+
+
+class WorkerEnvironment:
+    """
+    Declared environment of a worker sandbox.
+
+    The manifest (Python version, system packages, pip requirements and NLTK data)
+    is hashed into a snapshot name, so every sandbox created from the same manifest
+    can reuse one prebuilt snapshot instead of running pip install on creation.
+    """
+
+    def __init__(self, requirements_path=REQUIREMENTS_FILE, python_version=PYTHON_VERSION,
+                 system_packages=None, nltk_data=None):
+        self.requirements_path = requirements_path
+        self.python_version = python_version
+        self.system_packages = list(system_packages if system_packages is not None else SYSTEM_PACKAGES)
+        self.nltk_data = list(nltk_data if nltk_data is not None else NLTK_DATA)
+        self.packages = self._load_requirements()
+
+    def _load_requirements(self):
+        packages = []
+        with open(self.requirements_path, 'r') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    packages.append(line)
+        return packages
+
+    def manifest(self):
+        return {
+            "python": self.python_version,
+            "system_packages": sorted(self.system_packages),
+            "packages": sorted(self.packages),
+            "nltk_data": sorted(self.nltk_data),
+        }
+
+    def digest(self):
+        """Stable hash of the manifest."""
+        payload = json.dumps(self.manifest(), sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    def snapshot_name(self):
+        prefix = os.environ.get("WORKER_SNAPSHOT_PREFIX", "resumebuilder-worker")
+        return f"{prefix}-{self.digest()[:12]}"
+
+    def install_command(self):
+        """Command used on sandboxes created without the snapshot."""
+        return f"pip install {' '.join(self.packages)}"
+
+    def build_image(self):
+        """Daytona image declaration equivalent to the manifest."""
+        from daytona_sdk import Image
+
+        nltk_cmd = f"python -m nltk.downloader {' '.join(self.nltk_data)}"
+        return (
+            Image.debian_slim(self.python_version)
+            .run_commands(
+                "apt-get update",
+                f"apt-get install -y --no-install-recommends {' '.join(self.system_packages)}",
+                "rm -rf /var/lib/apt/lists/*",
+            )
+            .pip_install(self.packages)
+            .run_commands(nltk_cmd)
+        )
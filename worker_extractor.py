@@ -1,6 +1,6 @@
 import sys
 import os
-from resume_extractor import extract_resume_content
+from resume_extractor import ExtractionError, extract_resume_content
 
 def main():
     if len(sys.argv) < 2:
@@ -12,7 +12,12 @@ def main():
         print(f"Error: File {file_path} not found")
         sys.exit(1)
 
-    result = extract_resume_content(file_path)
+    try:
+        result = extract_resume_content(file_path)
+    except ExtractionError as e:
+        # A non-zero exit, not text, tells the caller that extraction failed
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
     print(result)
 
 if __name__ == "__main__":